@@ -0,0 +1,104 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# --- Configuración del Benchmark de Arranque ---
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+# Módulo de cada punto de entrada y la entrada estándar con la que su main() termina de inmediato
+PUNTOS_DE_ENTRADA = {
+    'Datos': '5\n',
+    'Bibliotecamodif': '5\n',
+    'taller4': '5\n',
+    'Mundo': '',
+}
+REPETICIONES = 5
+PRESUPUESTO_IMPORT_MS = 50.0   # Importación acumulada del módulo (python -X importtime)
+PRESUPUESTO_MAIN_MS = 300.0    # Proceso completo: intérprete + importación + main() hasta salir
+
+# --- 1. Mediciones ---
+
+def _ejecutar(codigo, entrada, directorio, opciones=()):
+    """Ejecuta 'codigo' en un intérprete nuevo y retorna (segundos, resultado del proceso)."""
+    entorno = dict(os.environ, PYTHONPATH=DIRECTORIO_REPO, PYTHONDONTWRITEBYTECODE='1')
+    inicio = time.perf_counter()
+    resultado = subprocess.run(
+        [sys.executable, *opciones, '-c', codigo],
+        input=entrada, capture_output=True, text=True, cwd=directorio, env=entorno,
+    )
+    return time.perf_counter() - inicio, resultado
+
+def medir_importacion(modulo, directorio):
+    """
+    Tiempo acumulado (ms) de importar 'modulo', según 'python -X importtime'.
+    Retorna también los 5 imports propios más costosos para orientar la optimización.
+    """
+    _, resultado = _ejecutar(f"import {modulo}", '', directorio, ('-X', 'importtime'))
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    acumulado, costosos = None, []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or '[us]' in linea:
+            continue
+        propio, total, nombre = (parte.strip() for parte in linea[len('import time:'):].split('|'))
+        costosos.append((int(propio) / 1000, nombre))
+        if nombre == modulo:
+            acumulado = int(total) / 1000
+    return acumulado, sorted(costosos, reverse=True)[:5]
+
+def medir_main(modulo, entrada, directorio):
+    """Tiempo de reloj (ms) de un proceso que importa 'modulo' y corre su main() hasta salir."""
+    segundos, resultado = _ejecutar(f"import {modulo}; {modulo}.main()", entrada, directorio)
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    return segundos * 1000
+
+# --- Función Principal ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de los puntos de entrada.")
+    parser.add_argument('modulos', nargs='*', default=list(PUNTOS_DE_ENTRADA), help="Módulos a medir.")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES, help="Se reporta el mejor tiempo.")
+    parser.add_argument('--presupuesto-import-ms', type=float, default=PRESUPUESTO_IMPORT_MS)
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MAIN_MS)
+    parser.add_argument('--detalle', action='store_true', help="Muestra los imports más costosos.")
+    args = parser.parse_args()
+
+    print(f"{'Punto de entrada':<18} | {'Import (ms)':>11} | {'main() (ms)':>11} | Estado")
+    print("-" * 58)
+    excedidos = 0
+    # Directorio temporal: los main() crean sus bases SQLite relativas sin tocar las reales
+    with tempfile.TemporaryDirectory() as directorio:
+        for modulo in args.modulos:
+            try:
+                importacion, costosos = min(
+                    (medir_importacion(modulo, directorio) for _ in range(args.repeticiones)),
+                    key=lambda medicion: medicion[0],
+                )
+                tiempo_main = min(
+                    medir_main(modulo, PUNTOS_DE_ENTRADA.get(modulo, ''), directorio)
+                    for _ in range(args.repeticiones)
+                )
+            except RuntimeError as e:
+                print(f"{modulo:<18} | {'-':>11} | {'-':>11} | ❌ Error: {e}")
+                excedidos += 1
+                continue
+
+            ok = importacion <= args.presupuesto_import_ms and tiempo_main <= args.presupuesto_ms
+            excedidos += not ok
+            print(f"{modulo:<18} | {importacion:>11.1f} | {tiempo_main:>11.1f} | "
+                  f"{'✅ OK' if ok else '❌ Excede el presupuesto'}")
+            if args.detalle:
+                for propio, nombre in costosos:
+                    print(f"{'':<18}   {propio:>8.1f} ms  {nombre}")
+    print("-" * 58)
+    print(f"Presupuesto: import <= {args.presupuesto_import_ms:.0f} ms, main() <= {args.presupuesto_ms:.0f} ms")
+
+    if excedidos:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
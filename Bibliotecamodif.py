@@ -1,7 +1,6 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean 
-from sqlalchemy.orm import declarative_base, sessionmaker 
-from sqlalchemy.exc import OperationalError, SQLAlchemyError 
 import os
+from types import SimpleNamespace
+from Duplicados import clave_bloqueo, normalizar_texto, normalizar_autor, similitud, UMBRAL_SIMILITUD
 
 # --- 1. Configuración de la Base de Datos MariaDB/MySQL ---
 # NOTA: Asegúrate de que tu servidor MariaDB/MySQL esté en ejecución
@@ -16,58 +15,215 @@ DB_NAME = 'biblioteca_orm'
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # --- 2. Definición del ORM (Modelo de Datos) ---
+# SQLAlchemy se importa recién cuando se necesita: importar este módulo o mostrar el menú
+# no carga el ORM ni abre la conexión a MariaDB.
+_orm = None
 
-# Base declarativa para nuestras clases de modelo
-Base = declarative_base()
+def cargar_orm():
+    """Importa SQLAlchemy y define los modelos la primera vez; luego retorna los mismos objetos."""
+    global _orm
+    if _orm is not None:
+        return _orm
 
-class Libro(Base):
-    """Define la estructura de la tabla 'libros'."""
-    __tablename__ = 'libros'
+    from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+    from sqlalchemy.orm import declarative_base, relationship
+    from sqlalchemy.exc import SQLAlchemyError
 
-    id = Column(Integer, primary_key=True)
-    titulo = Column(String(255), nullable=False)
-    autor = Column(String(255), nullable=False)
-    anio_publicacion = Column(Integer)
-    genero = Column(String(100))
-    leido = Column(Boolean, default=False) # SQLAlchemy maneja Boolean como 0/1
+    # Base declarativa para nuestras clases de modelo
+    Base = declarative_base()
 
-    def __repr__(self):
-        """Representación legible del objeto."""
-        return f"<Libro(id={self.id}, titulo='{self.titulo}', autor='{self.autor}')>"
+    class Autor(Base):
+        """Catálogo de autores: cada nombre se guarda una sola vez."""
+        __tablename__ = 'autores'
+
+        id = Column(Integer, primary_key=True)
+        nombre = Column(String(255), nullable=False, unique=True)
+
+    class Genero(Base):
+        """Catálogo de géneros: cada nombre se guarda una sola vez."""
+        __tablename__ = 'generos'
+
+        id = Column(Integer, primary_key=True)
+        nombre = Column(String(100), nullable=False, unique=True)
+
+    class Libro(Base):
+        """Define la estructura de la tabla 'libros' (autor y género como claves foráneas)."""
+        __tablename__ = 'libros'
+
+        id = Column(Integer, primary_key=True)
+        titulo = Column(String(255), nullable=False)
+        autor_id = Column(Integer, ForeignKey('autores.id'), nullable=False, index=True)
+        anio_publicacion = Column(Integer)
+        genero_id = Column(Integer, ForeignKey('generos.id'), index=True)
+        leido = Column(Boolean, default=False) # SQLAlchemy maneja Boolean como 0/1
+        clave_bloqueo = Column(String(64), index=True) # Clave normalizada para detectar duplicados
+
+        # lazy='joined': el nombre se carga en la misma consulta y sigue disponible tras cerrar la sesión
+        autor_ref = relationship(Autor, lazy='joined')
+        genero_ref = relationship(Genero, lazy='joined')
+
+        @property
+        def autor(self):
+            """Nombre del autor (compatibilidad con el modelo de texto libre)."""
+            return self.autor_ref.nombre if self.autor_ref else None
+
+        @property
+        def genero(self):
+            """Nombre del género (compatibilidad con el modelo de texto libre)."""
+            return self.genero_ref.nombre if self.genero_ref else None
+
+        def __repr__(self):
+            """Representación legible del objeto."""
+            return f"<Libro(id={self.id}, titulo='{self.titulo}', autor='{self.autor}')>"
+
+    _orm = SimpleNamespace(Base=Base, Autor=Autor, Genero=Genero, Libro=Libro, SQLAlchemyError=SQLAlchemyError)
+    return _orm
+
+def __getattr__(nombre):
+    """Permite seguir usando Bibliotecamodif.Libro (y los demás modelos), cargándolos a demanda."""
+    if nombre in ('Base', 'Autor', 'Genero', 'Libro'):
+        return getattr(cargar_orm(), nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
 # --- 3. Conexión y Sesión ---
+_SessionLocal = None
 
-# Creamos el motor de la base de datos
-try:
-    engine = create_engine(DATABASE_URL)
-    # Crea las tablas definidas en el modelo (si no existen)
-    Base.metadata.create_all(engine)
-    
-    # Creamos una clase Session
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    print(f"✅ Conexión a MariaDB '{DB_NAME}' exitosa. Tablas verificadas/creadas.")
-
-except OperationalError as e:
-    print("\n❌ ERROR CRÍTICO DE CONEXIÓN A LA BASE DE DATOS ❌")
-    print("---------------------------------------------------------------------")
-    print(f"Asegúrate de que el servidor MariaDB/MySQL esté corriendo y que la base de datos '{DB_NAME}' exista.")
-    print("Revisa tus credenciales (usuario/contraseña) y la configuración en el código.")
-    print(f"Detalle: {e}")
-    # Detenemos la ejecución si la conexión inicial falla
-    exit(1)
-except SQLAlchemyError as e:
-    print(f"❌ Error general de SQLAlchemy: {e}")
-    exit(1)
+def migrar_esquema(engine):
+    """
+    Convierte una tabla 'libros' creada con el modelo anterior (autor y género como texto)
+    al modelo actual: create_all no modifica tablas existentes. Carga los nombres en
+    'autores' y 'generos', completa 'autor_id' y 'genero_id' y elimina las columnas de texto.
+    Si se interrumpe, basta con volver a ejecutarla: se repite mientras quede la columna 'autor'.
+    Retorna True si la tabla se migró.
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    columnas = {columna['name'] for columna in inspector.get_columns('libros')}
+    if 'autor' not in columnas:
+        return False
+    # En MySQL cada ALTER se confirma solo: al reanudar se omite lo que ya se hizo
+    indices = {indice['name'] for indice in inspector.get_indexes('libros')}
+    claves_foraneas = {clave['name'] for clave in inspector.get_foreign_keys('libros')}
+
+    es_mysql = engine.dialect.name in ('mysql', 'mariadb')
+    with engine.begin() as conn:
+        for columna, catalogo in (('autor', 'autores'), ('genero', 'generos')):
+            if columna not in columnas:
+                continue
+            if f'{columna}_id' not in columnas:
+                conn.execute(text(f"ALTER TABLE libros ADD COLUMN {columna}_id INTEGER"))
+            conn.execute(text(f"""
+                INSERT INTO {catalogo} (nombre)
+                SELECT DISTINCT {columna} FROM libros
+                WHERE {columna} IS NOT NULL AND {columna} NOT IN (SELECT nombre FROM {catalogo})
+            """))
+            conn.execute(text(f"""
+                UPDATE libros SET {columna}_id =
+                    (SELECT id FROM {catalogo} WHERE {catalogo}.nombre = libros.{columna})
+            """))
+            if f'ix_libros_{columna}_id' not in indices:
+                conn.execute(text(f"CREATE INDEX ix_libros_{columna}_id ON libros ({columna}_id)"))
+            if es_mysql and f'fk_libros_{columna}' not in claves_foraneas:
+                # SQLite no permite agregar restricciones a una tabla existente
+                nulidad = "NOT NULL" if columna == 'autor' else "NULL"
+                conn.execute(text(f"""
+                    ALTER TABLE libros MODIFY {columna}_id INTEGER {nulidad},
+                    ADD CONSTRAINT fk_libros_{columna} FOREIGN KEY ({columna}_id) REFERENCES {catalogo} (id)
+                """))
+            conn.execute(text(f"ALTER TABLE libros DROP COLUMN {columna}"))
+    print("✅ Tabla 'libros' migrada al modelo con tablas 'autores' y 'generos'.")
+    return True
+
+def completar_claves(engine, todas=False, tamanio_lote=1000):
+    """
+    Agrega la columna 'clave_bloqueo' a tablas creadas antes de la detección de duplicados
+    (create_all no modifica tablas existentes) y calcula la clave de los libros que no la
+    tienen (o de todos si 'todas'). Retorna la cantidad de libros actualizados.
+    """
+    orm = cargar_orm()
+    from sqlalchemy import inspect, text
+    from sqlalchemy.orm import Session
+
+    columnas = {columna['name'] for columna in inspect(engine).get_columns('libros')}
+    if 'clave_bloqueo' not in columnas:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE libros ADD COLUMN clave_bloqueo VARCHAR(64)"))
+            conn.execute(text("CREATE INDEX ix_libros_clave_bloqueo ON libros (clave_bloqueo)"))
+
+    actualizados = 0
+    with Session(engine) as session:
+        ultimo_id = 0
+        while True:
+            consulta = session.query(orm.Libro).filter(orm.Libro.id > ultimo_id)
+            if not todas:
+                consulta = consulta.filter(orm.Libro.clave_bloqueo.is_(None))
+            lote = consulta.order_by(orm.Libro.id).limit(tamanio_lote).all()
+            if not lote:
+                break
+            for libro in lote:
+                libro.clave_bloqueo = clave_bloqueo(libro.titulo, libro.autor)
+            session.commit()
+            actualizados += len(lote)
+            ultimo_id = lote[-1].id
+    return actualizados
+
+def get_session_factory():
+    """Crea el motor y la clase Session en la primera operación y luego los reutiliza."""
+    global _SessionLocal
+    if _SessionLocal is not None:
+        return _SessionLocal
+
+    orm = cargar_orm()
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.exc import OperationalError
+
+    # Creamos el motor de la base de datos
+    try:
+        engine = create_engine(DATABASE_URL)
+        # Crea las tablas definidas en el modelo (si no existen)
+        orm.Base.metadata.create_all(engine)
+        # Tablas creadas por versiones anteriores del modelo
+        migrar_esquema(engine)
+        completar_claves(engine)
+        
+        # Creamos una clase Session
+        _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        print(f"✅ Conexión a MariaDB '{DB_NAME}' exitosa. Tablas verificadas/creadas.")
+
+    except OperationalError as e:
+        print("\n❌ ERROR CRÍTICO DE CONEXIÓN A LA BASE DE DATOS ❌")
+        print("---------------------------------------------------------------------")
+        print(f"Asegúrate de que el servidor MariaDB/MySQL esté corriendo y que la base de datos '{DB_NAME}' exista.")
+        print("Revisa tus credenciales (usuario/contraseña) y la configuración en el código.")
+        print(f"Detalle: {e}")
+        # Detenemos la ejecución si la conexión inicial falla
+        exit(1)
+    except orm.SQLAlchemyError as e:
+        print(f"❌ Error general de SQLAlchemy: {e}")
+        exit(1)
+    return _SessionLocal
 
 
 def get_db_session():
     """Genera una nueva sesión de base de datos para cada operación."""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
 
+def obtener_o_crear(session, modelo, nombre):
+    """Busca una fila de catálogo (Autor o Genero) por nombre y la crea si no existe."""
+    if nombre is None:
+        return None
+    fila = session.query(modelo).filter(modelo.nombre == nombre).first()
+    if fila is None:
+        fila = modelo(nombre=nombre)
+        session.add(fila)
+    return fila
+
 # --- 4. Funciones de la Biblioteca (Usando ORM) ---
 
 def agregar_libro():
@@ -90,22 +246,39 @@ def agregar_libro():
     genero = input("Género: ").strip()
     genero = genero if genero else None
 
-    # Creamos un objeto Libro
-    nuevo_libro = Libro(
-        titulo=titulo,
-        autor=autor,
-        anio_publicacion=anio,
-        genero=genero,
-        leido=False
-    )
+    clave = clave_bloqueo(titulo, autor)
     
     # Abrimos sesión, agregamos y confirmamos (commit)
+    orm = cargar_orm()
     session = next(get_db_session())
     try:
+        # Advertencia de posibles duplicados (consulta por la clave de bloqueo indexada)
+        nuevo = (normalizar_texto(titulo), normalizar_autor(autor))
+        similares = [
+            libro for libro in session.query(orm.Libro).filter(orm.Libro.clave_bloqueo == clave)
+            if similitud(nuevo, (normalizar_texto(libro.titulo), normalizar_autor(libro.autor))) >= UMBRAL_SIMILITUD
+        ]
+        if similares:
+            print("\n⚠️ Advertencia: Ya existen libros muy parecidos:")
+            for libro in similares:
+                print(f"  {libro.id:<4} | {libro.titulo[:40]:<40} | {libro.autor[:25]}")
+            if input("¿Agregarlo de todas formas? (s/N): ").strip().lower() != 's':
+                print("Operación cancelada.")
+                return
+
+        # Creamos un objeto Libro (autor y género se reutilizan si ya existen)
+        nuevo_libro = orm.Libro(
+            titulo=titulo,
+            autor_ref=obtener_o_crear(session, orm.Autor, autor),
+            anio_publicacion=anio,
+            genero_ref=obtener_o_crear(session, orm.Genero, genero),
+            leido=False,
+            clave_bloqueo=clave
+        )
         session.add(nuevo_libro)
         session.commit()
         print(f"\n✅ Libro '{titulo}' de {autor} agregado exitosamente (ID: {nuevo_libro.id}).")
-    except SQLAlchemyError as e:
+    except orm.SQLAlchemyError as e:
         session.rollback()
         print(f"❌ Error al insertar el libro: {e}")
     finally:
@@ -113,8 +286,9 @@ def agregar_libro():
 
 def listar_libros():
     """Muestra todos los libros consultados a través del ORM."""
+    orm = cargar_orm()
     session = next(get_db_session())
-    libros = session.query(Libro).order_by(Libro.id.desc()).all()
+    libros = session.query(orm.Libro).order_by(orm.Libro.id.desc()).all()
     session.close()
     
     if not libros:
@@ -140,10 +314,11 @@ def marcar_como_leido():
         print("❌ Error: Por favor, ingresa un número válido.")
         return
 
+    orm = cargar_orm()
     session = next(get_db_session())
     try:
         # Busca el objeto Libro por ID
-        libro = session.query(Libro).filter(Libro.id == libro_id).first()
+        libro = session.query(orm.Libro).filter(orm.Libro.id == libro_id).first()
         
         if libro:
             if libro.leido:
@@ -155,7 +330,7 @@ def marcar_como_leido():
             print(f"✅ Libro con ID {libro_id} ('{libro.titulo}') marcado como LEÍDO.")
         else:
             print(f"⚠️ Advertencia: No se encontró ningún libro con el ID {libro_id}.")
-    except SQLAlchemyError as e:
+    except orm.SQLAlchemyError as e:
         session.rollback()
         print(f"❌ Error al actualizar el libro: {e}")
     finally:
@@ -170,9 +345,10 @@ def eliminar_libro():
         print("❌ Error: Por favor, ingresa un número válido.")
         return
 
+    orm = cargar_orm()
     session = next(get_db_session())
     try:
-        libro = session.query(Libro).filter(Libro.id == libro_id).first()
+        libro = session.query(orm.Libro).filter(orm.Libro.id == libro_id).first()
         
         if libro:
             session.delete(libro) # Eliminamos el objeto
@@ -180,7 +356,7 @@ def eliminar_libro():
             print(f"✅ Libro con ID {libro_id} ('{libro.titulo}') eliminado exitosamente.")
         else:
             print(f"⚠️ Advertencia: No se encontró ningún libro con el ID {libro_id}.")
-    except SQLAlchemyError as e:
+    except orm.SQLAlchemyError as e:
         session.rollback()
         print(f"❌ Error al eliminar el libro: {e}")
     finally:
@@ -202,7 +378,7 @@ def mostrar_menu():
 
 def main():
     """Función principal para correr la aplicación CLI."""
-    # Base.metadata.create_all(engine) ya fue llamado en la sección de conexión
+    # La conexión (y Base.metadata.create_all) ocurre en la primera operación, ver get_session_factory()
     
     while True:
         mostrar_menu()
@@ -0,0 +1,339 @@
+import sqlite3
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate
+import Datos
+
+# --- Configuración del Generador de Carga ---
+DB_CARGA = 'carga_biblioteca.db'   # Nunca se usa la base real: se recrea en cada configuración
+ID_APLICACION = 0x43415247         # 'CARG' en PRAGMA application_id: marca las bases de carga
+FILAS_INICIALES = 10000
+CLIENTES = 8
+DURACION = 10.0                    # Segundos por configuración
+MEZCLA = 'lectura=70,insercion=10,leido=15,eliminacion=5'
+CONFIGURACIONES = 'wal:normal,delete:full'   # modo_journal:synchronous
+TIMEOUT_BLOQUEO = 0.05             # Espera interna de SQLite antes de lanzar 'database is locked'
+MAX_REINTENTOS = 20
+VENTANA = 1.0                      # Segundos por intervalo de la serie temporal
+REFRESCO_IDS = 200                 # Operaciones entre consultas de MAX(id) para incluir los insertados
+
+MODOS_JOURNAL = ('delete', 'truncate', 'persist', 'memory', 'wal', 'off')
+MODOS_SYNCHRONOUS = ('off', 'normal', 'full', 'extra')
+
+GENEROS = ['Novela', 'Ensayo', 'Poesía', 'Ciencia Ficción', 'Fantasía', 'Historia']
+
+# --- 1. Operaciones (usan las funciones de almacenamiento de Datos.py) ---
+# Cada operación retorna True si encontró (o creó) la fila sobre la que actúa.
+
+def _op_lectura(conn, libro_id, aleatorio):
+    return Datos.obtener_libro(conn, libro_id) is not None
+
+def _op_insercion(conn, libro_id, aleatorio):
+    """Inserta un libro nuevo; si 'libro_id' no es None, vuelve a crear ese ID eliminado."""
+    datos = (
+        f"Libro de carga {aleatorio.getrandbits(32)}", f"Autor {aleatorio.randint(1, 500)}",
+        aleatorio.randint(1900, 2024), aleatorio.choice(GENEROS)
+    )
+    try:
+        Datos.insertar_libro(conn, *datos, libro_id=libro_id)
+    except sqlite3.IntegrityError:
+        # Otra inserción ya ocupó el ID (SQLite reutiliza el mayor ID eliminado)
+        Datos.insertar_libro(conn, *datos)
+    return True
+
+def _op_leido(conn, libro_id, aleatorio):
+    return Datos.actualizar_leido(conn, libro_id, aleatorio.randint(0, 1))
+
+def _op_eliminacion(conn, libro_id, aleatorio):
+    return Datos.borrar_libro(conn, libro_id)
+
+OPERACIONES = {
+    'lectura': _op_lectura,
+    'insercion': _op_insercion,
+    'leido': _op_leido,
+    'eliminacion': _op_eliminacion,
+}
+
+def interpretar_mezcla(texto):
+    """Convierte 'lectura=70,insercion=10,...' en un diccionario {operación: peso}."""
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in OPERACIONES:
+            raise ValueError(f"Operación desconocida '{nombre}'. Opciones: {', '.join(OPERACIONES)}")
+        mezcla[nombre] = float(peso)
+    return mezcla
+
+def pesos_zipf(n, exponente):
+    """Pesos acumulados de una distribución Zipf sobre los IDs 1..n (el ID 1 es el más frecuente)."""
+    return list(accumulate(1 / k ** exponente for k in range(1, n + 1)))
+
+# --- 2. Preparación de la Base de Datos ---
+
+def verificar_ruta_carga(ruta):
+    """
+    Lanza ValueError si 'ruta' es la base real de Datos.py o un archivo existente que no
+    fue creado por este generador: preparar_bd() lo eliminaría.
+    """
+    if os.path.abspath(ruta) == os.path.abspath(Datos.DB_NAME):
+        raise ValueError(f"'{ruta}' es la base de datos real de la biblioteca.")
+    if not os.path.exists(ruta):
+        return
+    try:
+        conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+        try:
+            id_aplicacion = conn.execute("PRAGMA application_id").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        id_aplicacion = None
+    if id_aplicacion != ID_APLICACION:
+        raise ValueError(f"'{ruta}' ya existe y no es una base de carga; no se eliminará.")
+
+def preparar_bd(ruta, modo_journal, filas):
+    """Recrea la base de carga con 'filas' libros y el modo de journal indicado."""
+    verificar_ruta_carga(ruta)
+    for sufijo in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+
+    Datos.crear_tabla(ruta)
+    conn = Datos.get_db_connection(ruta)
+    try:
+        conn.execute(f"PRAGMA application_id = {ID_APLICACION}")
+        # Solo el modo WAL queda guardado en el archivo: los clientes vuelven a fijarlo al conectarse
+        conn.execute(f"PRAGMA journal_mode = {modo_journal}")
+        aleatorio = random.Random(0)
+        for _ in range(filas):
+            _op_insercion(conn, None, aleatorio)
+        conn.commit()
+    finally:
+        conn.close()
+
+# --- 3. Cliente ---
+
+def cliente(numero, ruta, modo_journal, synchronous, mezcla, filas, exponente_zipf, inicio, duracion, timeout):
+    """
+    Ejecuta operaciones aleatorias hasta que se cumpla la duración. Cada operación se
+    confirma por separado y se reintenta con espera aleatoria si la base está bloqueada.
+    Los IDs se eligen entre 1 y el MAX(id) actual (así se alcanzan también los insertados)
+    y las inserciones vuelven a crear los IDs que este cliente eliminó, para que el
+    conjunto de filas vivas no se vacíe durante la prueba.
+    Retorna una lista de (segundo relativo, operación, latencia, reintentos, espera por bloqueo,
+    ok, fila encontrada).
+    """
+    aleatorio = random.Random(numero)
+    nombres, pesos = list(mezcla), list(mezcla.values())
+    acumulados = pesos_zipf(filas, exponente_zipf) if exponente_zipf > 0 else None
+
+    conn = Datos.get_db_connection(ruta, timeout=timeout)
+    # journal_mode (salvo WAL) y synchronous valen solo para esta conexión
+    modo_efectivo = conn.execute(f"PRAGMA journal_mode = {modo_journal}").fetchone()[0]
+    if modo_efectivo != modo_journal:
+        conn.close()
+        raise RuntimeError(f"SQLite no aceptó journal_mode={modo_journal} (quedó en '{modo_efectivo}').")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    registros = []
+    borrados = []      # IDs eliminados por este cliente, pendientes de volver a insertar
+    max_id = filas
+
+    # Todos los clientes arrancan en el mismo instante
+    time.sleep(max(0.0, inicio - time.time()))
+    fin = inicio + duracion
+    operaciones = 0
+    while time.time() < fin:
+        if operaciones % REFRESCO_IDS == 0:
+            try:
+                max_id = conn.execute("SELECT MAX(id) FROM libros").fetchone()[0] or max_id
+            except sqlite3.OperationalError:
+                pass   # Base bloqueada: se sigue con el último MAX(id) conocido
+            if acumulados and max_id > len(acumulados):
+                # Los IDs nuevos se agregan a la cola de la distribución
+                total = acumulados[-1]
+                for k in range(len(acumulados) + 1, max_id + 1):
+                    total += 1 / k ** exponente_zipf
+                    acumulados.append(total)
+        operaciones += 1
+
+        nombre = aleatorio.choices(nombres, pesos)[0]
+        if nombre == 'insercion':
+            libro_id = borrados[-1] if borrados else None
+        elif acumulados:
+            libro_id = bisect_left(acumulados, aleatorio.random() * acumulados[-1]) + 1
+        else:
+            libro_id = aleatorio.randint(1, max_id)
+
+        t0 = time.perf_counter()
+        reintentos, espera, ok, encontrado = 0, 0.0, True, False
+        while True:
+            intento = time.perf_counter()
+            try:
+                encontrado = OPERACIONES[nombre](conn, libro_id, aleatorio)
+                conn.commit()
+                break
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    ok = False
+                    break
+                reintentos += 1
+                if reintentos > MAX_REINTENTOS:
+                    ok = False
+                    espera += time.perf_counter() - intento
+                    break
+                # Espera exponencial con variación aleatoria para no reintentar todos a la vez
+                time.sleep(aleatorio.uniform(0, 0.001 * 2 ** min(reintentos, 8)))
+                espera += time.perf_counter() - intento
+        latencia = time.perf_counter() - t0
+        registros.append((time.time() - inicio, nombre, latencia, reintentos, espera, ok, ok and encontrado))
+
+        # El conjunto de IDs vivos se actualiza solo con operaciones confirmadas
+        if ok and nombre == 'eliminacion' and encontrado:
+            borrados.append(libro_id)
+        elif ok and nombre == 'insercion' and libro_id is not None:
+            borrados.pop()
+
+    conn.close()
+    return registros
+
+# --- 4. Estadísticas ---
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) por rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+def _resumen(registros, duracion):
+    """Totales, rendimiento y percentiles de latencia (en ms) de un grupo de registros."""
+    latencias = sorted(r[2] * 1000 for r in registros)
+    return {
+        'operaciones': len(registros),
+        'ops_por_segundo': round(len(registros) / duracion, 1) if duracion else 0.0,
+        'reintentos_bloqueo': sum(r[3] for r in registros),
+        'espera_bloqueo_ms': round(sum(r[4] for r in registros) * 1000, 1),
+        'fallidas': sum(1 for r in registros if not r[5]),
+        'sin_fila': sum(1 for r in registros if r[5] and not r[6]),   # El ID ya no existía
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p95_ms': round(percentil(latencias, 95), 3),
+        'p99_ms': round(percentil(latencias, 99), 3),
+    }
+
+def analizar(registros, duracion, ventana=VENTANA):
+    """Arma el resumen general, por operación y la serie temporal por ventanas."""
+    por_operacion = {}
+    por_ventana = {}
+    for registro in registros:
+        por_operacion.setdefault(registro[1], []).append(registro)
+        por_ventana.setdefault(int(registro[0] // ventana), []).append(registro)
+
+    return {
+        'resumen': _resumen(registros, duracion),
+        'por_operacion': {nombre: _resumen(grupo, duracion) for nombre, grupo in sorted(por_operacion.items())},
+        'serie': [
+            dict(ventana=numero, segundo=round(numero * ventana, 3), **_resumen(grupo, ventana))
+            for numero, grupo in sorted(por_ventana.items())
+        ],
+    }
+
+# --- 5. Ejecución por Configuración ---
+
+def ejecutar_configuracion(args, modo_journal, synchronous, mezcla):
+    """Prepara la base, lanza los clientes (hilos o procesos) y retorna el análisis."""
+    preparar_bd(args.db, modo_journal, args.filas)
+    inicio = time.time() + 0.5
+    Ejecutor = ProcessPoolExecutor if args.modo == 'procesos' else ThreadPoolExecutor
+    with Ejecutor(max_workers=args.clientes) as ejecutor:
+        futuros = [
+            ejecutor.submit(cliente, numero, args.db, modo_journal, synchronous, mezcla, args.filas,
+                            args.zipf, inicio, args.duracion, args.timeout)
+            for numero in range(args.clientes)
+        ]
+        registros = [registro for futuro in futuros for registro in futuro.result()]
+    return analizar(registros, args.duracion, args.ventana)
+
+def exportar(resultados, ruta_csv, ruta_json):
+    """Guarda la serie temporal de cada configuración en CSV y todos los resultados en JSON."""
+    if ruta_csv:
+        with open(ruta_csv, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = None
+            for configuracion, resultado in resultados.items():
+                for fila in resultado['serie']:
+                    fila = {'configuracion': configuracion, **fila}
+                    if escritor is None:
+                        escritor = csv.DictWriter(archivo, fieldnames=list(fila))
+                        escritor.writeheader()
+                    escritor.writerow(fila)
+        print(f"📄 Serie temporal exportada a '{ruta_csv}'.")
+    if ruta_json:
+        with open(ruta_json, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"📄 Resultados exportados a '{ruta_json}'.")
+
+def mostrar_comparacion(resultados):
+    """Imprime el resumen de todas las configuraciones lado a lado."""
+    print("\n--- 📊 COMPARACIÓN DE CONFIGURACIONES ---")
+    print(f"{'Configuración':<16} | {'Ops/s':>8} | {'Reintentos':>10} | {'Espera (ms)':>11} | "
+          f"{'Fallidas':>8} | {'Sin fila':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7}")
+    print("-" * 106)
+    for configuracion, resultado in resultados.items():
+        r = resultado['resumen']
+        print(f"{configuracion:<16} | {r['ops_por_segundo']:>8.1f} | {r['reintentos_bloqueo']:>10} | "
+              f"{r['espera_bloqueo_ms']:>11.1f} | {r['fallidas']:>8} | {r['sin_fila']:>8} | "
+              f"{r['p50_ms']:>7.2f} | {r['p95_ms']:>7.2f} | {r['p99_ms']:>7.2f}")
+    print("-" * 106)
+
+# --- Función Principal ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga concurrente sobre el almacenamiento de Datos.py.")
+    parser.add_argument('--db', default=DB_CARGA, help="Base de datos de prueba (se recrea; nunca la real).")
+    parser.add_argument('--filas', type=int, default=FILAS_INICIALES, help="Libros iniciales.")
+    parser.add_argument('--clientes', type=int, default=CLIENTES, help="Clientes concurrentes.")
+    parser.add_argument('--modo', choices=('hilos', 'procesos'), default='hilos', help="Tipo de cliente.")
+    parser.add_argument('--duracion', type=float, default=DURACION, help="Segundos por configuración.")
+    parser.add_argument('--mezcla', default=MEZCLA, help="Pesos de cada operación.")
+    parser.add_argument('--zipf', type=float, default=0.0, help="Exponente Zipf para los IDs (0 = uniforme).")
+    parser.add_argument('--configs', default=CONFIGURACIONES, help="Lista modo_journal:synchronous a comparar.")
+    parser.add_argument('--timeout', type=float, default=TIMEOUT_BLOQUEO, help="Timeout de bloqueo de SQLite (s).")
+    parser.add_argument('--ventana', type=float, default=VENTANA, help="Segundos por intervalo de la serie.")
+    parser.add_argument('--csv', help="Ruta del CSV con la serie temporal.")
+    parser.add_argument('--json', help="Ruta del JSON con todos los resultados.")
+    args = parser.parse_args()
+
+    try:
+        mezcla = interpretar_mezcla(args.mezcla)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return
+
+    try:
+        verificar_ruta_carga(args.db)
+    except ValueError as e:
+        print(f"❌ Error: {e} Usa --db con una ruta de prueba.")
+        return
+
+    resultados = {}
+    for configuracion in args.configs.split(','):
+        modo_journal, _, synchronous = configuracion.strip().partition(':')
+        synchronous = synchronous or 'full'
+        nombre = f"{modo_journal}:{synchronous}"
+        if modo_journal not in MODOS_JOURNAL or synchronous not in MODOS_SYNCHRONOUS:
+            print(f"❌ Error: Configuración no válida '{nombre}'. Se omite.")
+            continue
+        print(f"▶️ {nombre}: {args.clientes} clientes ({args.modo}) durante {args.duracion:.0f} s...")
+        resultados[nombre] = ejecutar_configuracion(args, modo_journal, synchronous, mezcla)
+
+    mostrar_comparacion(resultados)
+    exportar(resultados, args.csv, args.json)
+
+if __name__ == "__main__":
+    main()
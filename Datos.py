@@ -1,13 +1,14 @@
 import sqlite3
 import os
+from Duplicados import actualizar_claves, asegurar_columna_clave, buscar_posibles_duplicados, clave_bloqueo
 
 # --- Configuración de la Base de Datos ---
 DB_NAME = 'biblioteca_personal.db'
 
-def get_db_connection():
-    """Establece la conexión a la base de datos y la retorna."""
+def get_db_connection(ruta=None, timeout=5.0):
+    """Establece la conexión a la base de datos ('ruta' o DB_NAME) y la retorna."""
     try:
-        conn = sqlite3.connect(DB_NAME)
+        conn = sqlite3.connect(ruta or DB_NAME, timeout=timeout)
         # Permite acceder a las columnas por nombre
         conn.row_factory = sqlite3.Row
         return conn
@@ -16,9 +17,9 @@ def get_db_connection():
         # En caso de error crítico de conexión
         exit(1)
 
-def crear_tabla():
+def crear_tabla(ruta=None):
     """Crea la tabla 'libros' si no existe."""
-    conn = get_db_connection()
+    conn = get_db_connection(ruta)
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -28,12 +29,43 @@ def crear_tabla():
             autor TEXT NOT NULL,
             anio_publicacion INTEGER,
             genero TEXT,
-            leido INTEGER DEFAULT 0 -- 0=No leído, 1=Leído
+            leido INTEGER DEFAULT 0, -- 0=No leído, 1=Leído
+            clave_bloqueo TEXT -- Clave normalizada para detectar duplicados
         );
     """)
     conn.commit()
+    # Bases creadas antes de la detección de duplicados no tienen la columna
+    asegurar_columna_clave(conn)
+    # ...ni la clave de sus libros: sin ella, la advertencia al insertar no los encontraría
+    actualizar_claves(conn)
     conn.close()
 
+# --- Operaciones de Almacenamiento (sin interacción; el llamador confirma con commit) ---
+
+def insertar_libro(conn, titulo, autor, anio=None, genero=None, libro_id=None):
+    """Inserta un libro con su clave de bloqueo (con 'libro_id' si se indica; si no, SQLite lo asigna)."""
+    conn.execute(
+        "INSERT INTO libros (id, titulo, autor, anio_publicacion, genero, clave_bloqueo) VALUES (?, ?, ?, ?, ?, ?)",
+        (libro_id, titulo, autor, anio, genero, clave_bloqueo(titulo, autor))
+    )
+
+def obtener_libro(conn, libro_id):
+    """Retorna la fila del libro con ese ID, o None si no existe."""
+    return conn.execute("SELECT * FROM libros WHERE id = ?", (libro_id,)).fetchone()
+
+def actualizar_leido(conn, libro_id, leido=1):
+    """Cambia el estado 'leido' de un libro. Retorna True si el libro existía."""
+    # total_changes también cuenta los cambios hechos a través de la vista 'libros' (Migracion.py)
+    antes = conn.total_changes
+    conn.execute("UPDATE libros SET leido = ? WHERE id = ?", (leido, libro_id))
+    return conn.total_changes != antes
+
+def borrar_libro(conn, libro_id):
+    """Elimina un libro. Retorna True si el libro existía."""
+    antes = conn.total_changes
+    conn.execute("DELETE FROM libros WHERE id = ?", (libro_id,))
+    return conn.total_changes != antes
+
 # --- Funciones de la Biblioteca ---
 
 def agregar_libro():
@@ -57,10 +89,17 @@ def agregar_libro():
     
     conn = get_db_connection()
     try:
-        conn.execute(
-            "INSERT INTO libros (titulo, autor, anio_publicacion, genero) VALUES (?, ?, ?, ?)",
-            (titulo, autor, anio if anio > 0 else None, genero if genero else None)
-        )
+        # Advertencia de posibles duplicados (búsqueda por la clave de bloqueo indexada)
+        similares = buscar_posibles_duplicados(conn, titulo, autor)
+        if similares:
+            print("\n⚠️ Advertencia: Ya existen libros muy parecidos:")
+            for libro in similares:
+                print(f"  {libro['id']:<4} | {libro['titulo'][:40]:<40} | {libro['autor'][:25]}")
+            if input("¿Agregarlo de todas formas? (s/N): ").strip().lower() != 's':
+                print("Operación cancelada.")
+                return
+
+        insertar_libro(conn, titulo, autor, anio if anio > 0 else None, genero if genero else None)
         conn.commit()
         print(f"\n✅ Libro '{titulo}' de {autor} agregado exitosamente.")
     except sqlite3.Error as e:
@@ -102,8 +141,7 @@ def marcar_como_leido():
 
     conn = get_db_connection()
     try:
-        cursor = conn.execute("UPDATE libros SET leido = 1 WHERE id = ?", (libro_id,))
-        if cursor.rowcount == 0:
+        if not actualizar_leido(conn, libro_id):
             print(f"⚠️ Advertencia: No se encontró ningún libro con el ID {libro_id}.")
         else:
             conn.commit()
@@ -124,8 +162,7 @@ def eliminar_libro():
 
     conn = get_db_connection()
     try:
-        cursor = conn.execute("DELETE FROM libros WHERE id = ?", (libro_id,))
-        if cursor.rowcount == 0:
+        if not borrar_libro(conn, libro_id):
             print(f"⚠️ Advertencia: No se encontró ningún libro con el ID {libro_id}.")
         else:
             conn.commit()
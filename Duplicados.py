@@ -0,0 +1,321 @@
+import sqlite3
+import re
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from itertools import groupby
+
+# --- Configuración de la Detección de Duplicados ---
+DB_NAME = 'biblioteca_personal.db'
+UMBRAL_SIMILITUD = 0.85   # Puntaje mínimo (0-1) para considerar dos libros duplicados
+MAX_BLOQUE = 150          # Bloques más grandes se comparan por ventanas para evitar O(n²)
+VENTANA = 50              # Tamaño de la ventana deslizante dentro de un bloque grande
+SIMILITUD_PALABRA = 0.75  # Dos palabras distintas más parecidas que esto se toman como errata
+
+# Palabras que no aportan al identificar un título
+PALABRAS_VACIAS = {
+    'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'de', 'del', 'y', 'e',
+    'en', 'a', 'al', 'the', 'of', 'and', 'an', 'le', 'les', 'des', 'du',
+}
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+# Números de tomo o edición, en cifras o romanos ('2', 'ii', 'xiv')
+_NUMERO = re.compile(r'^(\d+|x{0,3}(ix|iv|v?i{0,3}))$')
+
+# --- 1. Normalización y Claves de Bloqueo ---
+
+def normalizar_texto(texto):
+    """Pasa a minúsculas, elimina acentos y signos de puntuación y colapsa espacios."""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+def normalizar_autor(autor):
+    """Normaliza el autor ordenando sus palabras ('García Márquez, Gabriel' == 'Gabriel García Márquez')."""
+    return ' '.join(sorted(normalizar_texto(autor).split()))
+
+def apellido_autor(autor):
+    """
+    Último apellido normalizado del autor: la última palabra, o la última antes de la coma
+    en el formato 'Apellidos, Nombre' ('G. García Márquez' y 'García Márquez, Gabriel' -> 'marquez').
+    """
+    if not autor:
+        return ''
+    apellidos = autor.split(',')[0] if ',' in autor else autor
+    palabras = normalizar_texto(apellidos).split() or normalizar_texto(autor).split()
+    return palabras[-1] if palabras else ''
+
+def clave_bloqueo(titulo, autor):
+    """
+    Calcula la clave de bloqueo de un libro: prefijo del último apellido del autor y
+    prefijo de la primera palabra significativa del título.
+    Solo los libros con la misma clave se comparan entre sí.
+    """
+    apellido = apellido_autor(autor)[:6]
+
+    palabras_titulo = [p for p in normalizar_texto(titulo).split() if p not in PALABRAS_VACIAS]
+    if not palabras_titulo:
+        palabras_titulo = normalizar_texto(titulo).split() or ['']
+    return f"{apellido}:{palabras_titulo[0][:4]}"
+
+# --- 2. Esquema (columna e índice de la clave) ---
+
+def asegurar_columna_clave(conn):
+    """Agrega la columna 'clave_bloqueo' y su índice a la tabla 'libros' si aún no existen."""
+    fila = conn.execute("SELECT type FROM sqlite_master WHERE name = 'libros'").fetchone()
+    if fila and fila[0] == 'view':
+        # Esquema normalizado (Migracion.py): la columna y su índice viven en 'libros_datos'
+        return
+    columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(libros)")}
+    if 'clave_bloqueo' not in columnas:
+        conn.execute("ALTER TABLE libros ADD COLUMN clave_bloqueo TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_libros_clave_bloqueo ON libros(clave_bloqueo)")
+    conn.commit()
+
+def actualizar_claves(conn, todas=False):
+    """
+    Calcula la clave de los libros que aún no la tienen (o de todos si 'todas', por
+    ejemplo tras cambiar cómo se calcula la clave). Retorna cuántos se actualizaron.
+    """
+    # La función se registra en SQLite para que el cálculo ocurra en una sola sentencia UPDATE
+    conn.create_function('calcular_clave', 2, clave_bloqueo, deterministic=True)
+    # total_changes (y no rowcount) también cuenta los cambios hechos a través de la vista 'libros'
+    antes = conn.total_changes
+    conn.execute(
+        "UPDATE libros SET clave_bloqueo = calcular_clave(titulo, autor)"
+        + ("" if todas else " WHERE clave_bloqueo IS NULL")
+    )
+    conn.commit()
+    return conn.total_changes - antes
+
+# --- 3. Puntaje de Similitud ---
+
+def _numeros(titulo):
+    """Conjunto de números (en cifras o romanos) de un título normalizado."""
+    return {palabra for palabra in titulo.split() if _NUMERO.match(palabra)}
+
+def _palabra_reemplazada(titulo_a, titulo_b):
+    """
+    True si un título cambia una palabra significativa del otro por otra distinta
+    ('Historia de España' / 'Historia de Francia'), y no por una errata ('soledad' / 'soledda').
+    Agregar palabras (un subtítulo) no cuenta como reemplazo.
+    """
+    palabras_a = set(titulo_a.split()) - PALABRAS_VACIAS
+    palabras_b = set(titulo_b.split()) - PALABRAS_VACIAS
+    solo_a, solo_b = palabras_a - palabras_b, palabras_b - palabras_a
+    if not solo_a or not solo_b:
+        return False
+    return any(
+        all(SequenceMatcher(None, a, b).ratio() < SIMILITUD_PALABRA for b in solo_b)
+        for a in solo_a
+    ) and any(
+        all(SequenceMatcher(None, a, b).ratio() < SIMILITUD_PALABRA for a in solo_a)
+        for b in solo_b
+    )
+
+def comparadores(libro):
+    """
+    SequenceMatcher de título y autor con 'libro' como segunda secuencia: SequenceMatcher
+    indexa la segunda secuencia, así que comparar muchos libros contra el mismo los reutiliza.
+    """
+    return SequenceMatcher(None, '', libro[0]), SequenceMatcher(None, '', libro[1])
+
+def similitud(libro_a, libro_b, umbral=UMBRAL_SIMILITUD, comparadores_a=None):
+    """
+    Puntaje entre 0 y 1 de qué tan parecidos son dos libros (tuplas normalizadas
+    de título y autor). El título pesa más que el autor. Si los títulos llevan números
+    distintos ('Tomo 1' y 'Tomo 2') o uno reemplaza una palabra del otro ('tomo primero' y
+    'tomo segundo') no son el mismo libro y el puntaje es 0.
+    'comparadores_a' (de comparadores(libro_a)) evita reindexar libro_a en cada llamada.
+    """
+    if _numeros(libro_a[0]) != _numeros(libro_b[0]):
+        return 0.0
+    titulo, autor = comparadores_a or comparadores(libro_a)
+    titulo.set_seq1(libro_b[0])
+    # quick_ratio es una cota superior barata del título: aun con autores idénticos
+    # (0.3 del puntaje), por debajo de esta cota no se puede alcanzar el umbral
+    if titulo.quick_ratio() < (umbral - 0.3) / 0.7:
+        return 0.0
+    autor.set_seq1(libro_b[1])
+    puntaje = 0.7 * titulo.ratio() + 0.3 * autor.ratio()
+    # La revisión por palabras es la más cara: solo para pares que alcanzan el umbral
+    if puntaje >= umbral and _palabra_reemplazada(libro_a[0], libro_b[0]):
+        return 0.0
+    return puntaje
+
+def _agrupar_bloque(filas, umbral):
+    """
+    Agrupa los libros de un bloque alrededor de un representante: cada grupo es el primer
+    libro sin agrupar y los libros parecidos a él. Así todo miembro se parece al libro
+    que se conserva al fusionar (no se encadenan parecidos como 'A~B~C' con A y C distintos).
+    Retorna (grupos con el representante primero, cantidad de comparaciones).
+    """
+    n = len(filas)
+    if n <= MAX_BLOQUE:
+        # Por ID: el representante es el libro más antiguo del grupo
+        filas = sorted(filas)
+        alcance = n
+    else:
+        # Vecindario ordenado: solo se comparan libros cercanos en orden alfabético
+        filas = sorted(filas, key=lambda f: f[1])
+        alcance = VENTANA
+
+    agrupados = set()
+    grupos = []
+    comparaciones = 0
+    for i, representante in enumerate(filas):
+        if representante[0] in agrupados:
+            continue
+        miembros = []
+        comparadores_representante = comparadores(representante[1:])
+        for otro in filas[i + 1:i + alcance]:
+            if otro[0] in agrupados:
+                continue
+            comparaciones += 1
+            if similitud(representante[1:], otro[1:], umbral, comparadores_representante) >= umbral:
+                miembros.append(otro[0])
+        if miembros:
+            agrupados.update(miembros)
+            grupos.append([representante[0]] + sorted(miembros))
+    return grupos, comparaciones
+
+# --- 4. Búsqueda de Grupos de Duplicados ---
+
+def buscar_grupos_duplicados(conn, umbral=UMBRAL_SIMILITUD):
+    """
+    Recorre solo los bloques con más de un libro (usando el índice de la clave)
+    y agrupa los libros cuya similitud con el representante supera el umbral.
+    Retorna (lista de grupos de IDs con el representante primero, cantidad de comparaciones).
+    """
+    cursor = conn.execute("""
+        SELECT id, titulo, autor, clave_bloqueo FROM libros
+        WHERE clave_bloqueo IN (
+            SELECT clave_bloqueo FROM libros GROUP BY clave_bloqueo HAVING COUNT(*) > 1
+        )
+        ORDER BY clave_bloqueo
+    """)
+
+    grupos = []
+    comparaciones = 0
+    for _, bloque in groupby(cursor, key=lambda fila: fila[3]):
+        filas = [
+            (fila[0], normalizar_texto(fila[1]), normalizar_autor(fila[2]))
+            for fila in bloque
+        ]
+        grupos_bloque, comparaciones_bloque = _agrupar_bloque(filas, umbral)
+        grupos.extend(grupos_bloque)
+        comparaciones += comparaciones_bloque
+    return sorted(grupos), comparaciones
+
+def buscar_posibles_duplicados(conn, titulo, autor, umbral=UMBRAL_SIMILITUD):
+    """
+    Búsqueda indexada para advertir al insertar: retorna las filas (id, titulo, autor)
+    con la misma clave de bloqueo y similitud mayor o igual al umbral.
+    """
+    nuevo = (normalizar_texto(titulo), normalizar_autor(autor))
+    cursor = conn.execute(
+        "SELECT id, titulo, autor FROM libros WHERE clave_bloqueo = ?",
+        (clave_bloqueo(titulo, autor),)
+    )
+    return [
+        fila for fila in cursor
+        if similitud(nuevo, (normalizar_texto(fila[1]), normalizar_autor(fila[2])), umbral) >= umbral
+    ]
+
+# --- 5. Reporte y Fusión ---
+
+def reportar_grupos(conn, grupos):
+    """Muestra cada grupo de duplicados con sus libros."""
+    if not grupos:
+        print("✅ No se encontraron libros duplicados.")
+        return
+
+    print(f"\n--- 🔍 {len(grupos)} GRUPOS DE POSIBLES DUPLICADOS ---")
+    for numero, ids in enumerate(grupos, start=1):
+        print(f"\nGrupo {numero}:")
+        marcadores = ','.join('?' * len(ids))
+        for fila in conn.execute(
+            f"SELECT id, titulo, autor, anio_publicacion FROM libros WHERE id IN ({marcadores}) ORDER BY id",
+            ids
+        ):
+            print(f"  {fila[0]:<6} | {fila[1][:40]:<40} | {fila[2][:25]:<25} | {fila[3] if fila[3] else 'N/A'}")
+
+def fusionar_grupos(conn, grupos):
+    """
+    Fusiona cada grupo en el libro de menor ID: conserva 'leido' si alguno fue leído,
+    completa año y género faltantes con los de los demás y elimina el resto.
+    Retorna la cantidad de libros eliminados.
+    """
+    eliminados = 0
+    try:
+        for ids in grupos:
+            conservar, sobrantes = ids[0], ids[1:]
+            marcadores = ','.join('?' * len(ids))
+            conn.execute(f"""
+                UPDATE libros SET
+                    leido = (SELECT MAX(leido) FROM libros WHERE id IN ({marcadores})),
+                    anio_publicacion = COALESCE(anio_publicacion,
+                        (SELECT MAX(anio_publicacion) FROM libros WHERE id IN ({marcadores}))),
+                    genero = COALESCE(genero,
+                        (SELECT MAX(genero) FROM libros WHERE id IN ({marcadores})))
+                WHERE id = ?
+            """, ids * 3 + [conservar])
+            conn.execute(
+                f"DELETE FROM libros WHERE id IN ({','.join('?' * len(sobrantes))})", sobrantes
+            )
+            eliminados += len(sobrantes)
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"❌ Error al fusionar duplicados: {e}")
+        return 0
+    return eliminados
+
+# --- Función Principal ---
+
+def main():
+    # argparse y Respaldo solo hacen falta en la línea de comandos, no al importar desde Datos.py o taller4.py
+    import argparse
+    from Respaldo import respaldar
+
+    parser = argparse.ArgumentParser(description="Detecta y fusiona libros duplicados en la biblioteca.")
+    parser.add_argument('--db', default=DB_NAME, help="Ruta de la base de datos SQLite.")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_SIMILITUD, help="Similitud mínima (0-1).")
+    parser.add_argument('--fusionar', action='store_true',
+                        help="Fusiona los grupos encontrados (previo respaldo de la base).")
+    parser.add_argument('--si', action='store_true', help="Fusiona sin pedir confirmación.")
+    parser.add_argument('--recalcular', action='store_true',
+                        help="Recalcula la clave de bloqueo de todos los libros.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        inicio = time.perf_counter()
+        asegurar_columna_clave(conn)
+        actualizados = actualizar_claves(conn, todas=args.recalcular)
+        print(f"Claves de bloqueo calculadas para {actualizados} libros.")
+
+        grupos, comparaciones = buscar_grupos_duplicados(conn, args.umbral)
+        print(f"{comparaciones} comparaciones en {time.perf_counter() - inicio:.1f} s.")
+        reportar_grupos(conn, grupos)
+
+        if args.fusionar and grupos:
+            sobrantes = sum(len(ids) - 1 for ids in grupos)
+            if not args.si:
+                respuesta = input(f"\n¿Eliminar {sobrantes} libros fusionándolos en {len(grupos)} grupos? (s/N): ")
+                if respuesta.strip().lower() != 's':
+                    print("Fusión cancelada.")
+                    return
+            # Respaldo verificado antes de borrar: si falla, no se toca la base
+            if not respaldar(args.db):
+                print("❌ No se pudo respaldar la base. No se fusionó ningún libro.")
+                raise SystemExit(1)
+            eliminados = fusionar_grupos(conn, grupos)
+            print(f"\n✅ {eliminados} libros duplicados fusionados.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import sqlite3
+import argparse
+import mmap
+import operator
+import os
+import struct
+import sys
+import time
+from array import array
+
+# --- Configuración de la Instantánea ---
+DB_NAME = 'biblioteca_personal.db'
+ARCHIVO_INSTANTANEA = 'biblioteca_personal.snap'
+TAMANIO_LOTE = 10000   # Filas leídas por cada fetchmany()
+
+# Formato del archivo: cabecera, tabla de secciones (desplazamiento, longitud) y las
+# secciones en bytes nativos, alineadas a 8 bytes para poder mapearlas sin copiarlas.
+MAGIA = b'BIBSNAP3'
+# magia, orden de bytes (1=little), cantidad de filas y firma de la BD de origen (mtime_ns, tamaño)
+CABECERA = struct.Struct('<8sBxxxxxxxQqq')
+ENTRADA_SECCION = struct.Struct('<QQ')
+SIN_ANIO = -2**31          # Marca de año nulo: el año 0 y los años a.C. son valores válidos
+SECCIONES = [
+    ('id', 'q'),
+    ('anio', 'i'),           # SIN_ANIO = sin año
+    ('leido', 'b'),
+    ('titulo_off', 'q'),
+    ('titulo_dat', 'B'),
+    ('autor_cod', 'i'),      # -1 = sin autor
+    ('autor_off', 'q'),
+    ('autor_dat', 'B'),
+    ('genero_cod', 'i'),     # -1 = sin género
+    ('genero_off', 'q'),
+    ('genero_dat', 'B'),
+]
+
+# --- 1. Firma de la Base de Datos ---
+
+def firma_bd(ruta_bd):
+    """
+    Firma (mtime_ns, tamaño) de la base y su WAL: cambia con cada escritura confirmada.
+    Retorna None si la base no existe.
+    """
+    if not os.path.exists(ruta_bd):
+        return None
+    estados = [os.stat(ruta) for ruta in (ruta_bd, ruta_bd + '-wal') if os.path.exists(ruta)]
+    return max(e.st_mtime_ns for e in estados), sum(e.st_size for e in estados)
+
+# --- 2. Columnas ---
+
+class ColumnaTexto:
+    """
+    Columna de textos codificada por desplazamientos: todos los textos en UTF-8 van
+    concatenados en 'datos' y el texto i ocupa datos[desplazamientos[i]:desplazamientos[i + 1]].
+    """
+    __slots__ = ('desplazamientos', 'datos')
+
+    def __init__(self, desplazamientos=None, datos=None):
+        self.desplazamientos = desplazamientos if desplazamientos is not None else array('q', [0])
+        self.datos = datos if datos is not None else bytearray()
+
+    def agregar(self, texto):
+        """Agrega un texto al final de la columna y retorna su posición."""
+        self.datos += texto.encode('utf-8')
+        self.desplazamientos.append(len(self.datos))
+        return len(self.desplazamientos) - 2
+
+    def __len__(self):
+        return len(self.desplazamientos) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.datos[self.desplazamientos[i]:self.desplazamientos[i + 1]]).decode('utf-8')
+
+class FilaLibro:
+    """Vista de una fila de la instantánea. No copia datos: los lee de las columnas al acceder."""
+    __slots__ = ('_instantanea', '_i')
+
+    def __init__(self, instantanea, i):
+        self._instantanea = instantanea
+        self._i = i
+
+    @property
+    def id(self):
+        return self._instantanea.id[self._i]
+
+    @property
+    def titulo(self):
+        return self._instantanea.titulos[self._i]
+
+    @property
+    def autor(self):
+        return self._instantanea._texto(self._instantanea.autores, self._instantanea.autor_cod[self._i])
+
+    @property
+    def anio_publicacion(self):
+        anio = self._instantanea.anio[self._i]
+        return None if anio == SIN_ANIO else anio
+
+    @property
+    def genero(self):
+        return self._instantanea._texto(self._instantanea.generos, self._instantanea.genero_cod[self._i])
+
+    @property
+    def leido(self):
+        return self._instantanea.leido[self._i]
+
+    def __getitem__(self, columna):
+        """Acceso por nombre de columna, como con sqlite3.Row (libro['titulo'])."""
+        return getattr(self, columna)
+
+    def __repr__(self):
+        return f"<FilaLibro(id={self.id}, titulo='{self.titulo}', autor='{self.autor}')>"
+
+# --- 3. Instantánea Columnar ---
+
+class Instantanea:
+    """
+    Catálogo completo de 'libros' en columnas compactas: arreglos tipados para id, año y
+    leído, y diccionarios codificados para autor y género (cada nombre se guarda una vez).
+    """
+
+    def __init__(self):
+        self.id = array('q')
+        self.anio = array('i')
+        self.leido = array('b')
+        self.titulos = ColumnaTexto()
+        self.autor_cod = array('i')
+        self.autores = ColumnaTexto()
+        self.genero_cod = array('i')
+        self.generos = ColumnaTexto()
+        self.firma = None          # firma_bd() de la base de origen al generarla
+        self._mapa = None          # mmap del archivo cuando la instantánea se carga de disco
+        self._codigos = {}         # Cachés nombre -> código por columna de diccionario
+
+    def __len__(self):
+        return len(self.id)
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return FilaLibro(self, i)
+
+    def __iter__(self):
+        return (FilaLibro(self, i) for i in range(len(self)))
+
+    @staticmethod
+    def _texto(diccionario, codigo):
+        """Traduce un código de diccionario a su texto (-1 representa un valor nulo)."""
+        return diccionario[codigo] if codigo >= 0 else None
+
+    def codigo(self, columna, nombre):
+        """Retorna el código de 'nombre' en el diccionario 'autores' o 'generos' (None si no existe)."""
+        if columna not in self._codigos:
+            diccionario = getattr(self, columna)
+            self._codigos[columna] = {diccionario[c]: c for c in range(len(diccionario))}
+        return self._codigos[columna].get(nombre)
+
+    # --- Construcción desde SQLite ---
+
+    @classmethod
+    def desde_bd(cls, ruta_bd=DB_NAME):
+        """Construye la instantánea leyendo 'libros' por lotes, sin crear un objeto por fila."""
+        instantanea = cls()
+        # Firma tomada antes de leer: una escritura durante la lectura la deja desactualizada
+        instantanea.firma = firma_bd(ruta_bd)
+        codigos_autor, codigos_genero = {}, {}
+
+        def codificar(nombre, codigos, diccionario):
+            if nombre is None:
+                return -1
+            codigo = codigos.get(nombre)
+            if codigo is None:
+                codigo = codigos[nombre] = diccionario.agregar(nombre)
+            return codigo
+
+        conn = sqlite3.connect(ruta_bd)
+        try:
+            cursor = conn.execute(
+                "SELECT id, titulo, autor, anio_publicacion, genero, leido FROM libros ORDER BY id"
+            )
+            while True:
+                filas = cursor.fetchmany(TAMANIO_LOTE)
+                if not filas:
+                    break
+                for libro_id, titulo, autor, anio, genero, leido in filas:
+                    if anio is not None and not SIN_ANIO < anio < 2**31:
+                        raise ValueError(f"Año de publicación fuera de rango en el libro {libro_id}: {anio}")
+                    instantanea.id.append(libro_id)
+                    instantanea.titulos.agregar(titulo)
+                    instantanea.autor_cod.append(codificar(autor, codigos_autor, instantanea.autores))
+                    instantanea.anio.append(SIN_ANIO if anio is None else anio)
+                    instantanea.genero_cod.append(codificar(genero, codigos_genero, instantanea.generos))
+                    instantanea.leido.append(1 if leido else 0)
+        finally:
+            conn.close()
+
+        instantanea._codigos = {'autores': codigos_autor, 'generos': codigos_genero}
+        return instantanea
+
+    # --- Persistencia (archivo mapeable en memoria) ---
+
+    def _secciones(self):
+        """Columnas en el orden de SECCIONES."""
+        return [
+            self.id, self.anio, self.leido,
+            self.titulos.desplazamientos, self.titulos.datos,
+            self.autor_cod, self.autores.desplazamientos, self.autores.datos,
+            self.genero_cod, self.generos.desplazamientos, self.generos.datos,
+        ]
+
+    def guardar(self, ruta=ARCHIVO_INSTANTANEA):
+        """Escribe la instantánea en 'ruta' (primero a un temporal, luego lo reemplaza)."""
+        datos = [memoryview(columna).cast('B') for columna in self._secciones()]
+        desplazamiento = CABECERA.size + ENTRADA_SECCION.size * len(SECCIONES)
+        tabla = []
+        for seccion in datos:
+            desplazamiento += -desplazamiento % 8
+            tabla.append((desplazamiento, len(seccion)))
+            desplazamiento += len(seccion)
+
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(CABECERA.pack(MAGIA, sys.byteorder == 'little', len(self), *(self.firma or (0, 0))))
+            for entrada in tabla:
+                archivo.write(ENTRADA_SECCION.pack(*entrada))
+            for (inicio, _), seccion in zip(tabla, datos):
+                archivo.write(b'\0' * (inicio - archivo.tell()))
+                archivo.write(seccion)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta=ARCHIVO_INSTANTANEA):
+        """
+        Abre una instantánea guardada mapeando el archivo en memoria: las columnas son
+        vistas sobre el archivo, así que la carga no lee ni copia los datos.
+        """
+        with open(ruta, 'rb') as archivo:
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magia, little, _, mtime_ns, tamanio = CABECERA.unpack_from(mapa, 0)
+        if magia != MAGIA:
+            raise ValueError(f"'{ruta}' no es una instantánea de la biblioteca (o usa un formato anterior).")
+        if bool(little) != (sys.byteorder == 'little'):
+            raise ValueError(f"'{ruta}' fue generada en una máquina con otro orden de bytes.")
+
+        vista = memoryview(mapa)
+        columnas = []
+        for numero, (_, formato) in enumerate(SECCIONES):
+            inicio, longitud = ENTRADA_SECCION.unpack_from(mapa, CABECERA.size + numero * ENTRADA_SECCION.size)
+            columnas.append(vista[inicio:inicio + longitud].cast(formato))
+
+        instantanea = cls()
+        (instantanea.id, instantanea.anio, instantanea.leido,
+         titulo_off, titulo_dat, instantanea.autor_cod, autor_off, autor_dat,
+         instantanea.genero_cod, genero_off, genero_dat) = columnas
+        instantanea.titulos = ColumnaTexto(titulo_off, titulo_dat)
+        instantanea.autores = ColumnaTexto(autor_off, autor_dat)
+        instantanea.generos = ColumnaTexto(genero_off, genero_dat)
+        instantanea.firma = (mtime_ns, tamanio) if tamanio else None
+        instantanea._mapa = mapa
+        return instantanea
+
+    # --- Consultas ---
+
+    def _igualdades(self, autor, genero, leido):
+        """Lista de (columna, valor) a comparar; None si algún nombre no existe en la instantánea."""
+        igualdades = []
+        for columna, codigos, nombre in (
+            (self.autor_cod, 'autores', autor),
+            (self.genero_cod, 'generos', genero),
+        ):
+            if nombre is not None:
+                codigo = self.codigo(codigos, nombre)
+                if codigo is None:
+                    return None
+                igualdades.append((columna, codigo))
+        if leido is not None:
+            igualdades.append((self.leido, 1 if leido else 0))
+        return igualdades
+
+    def filtrar(self, autor=None, genero=None, leido=None, anio_desde=None, anio_hasta=None):
+        """
+        Retorna las posiciones de los libros que cumplen todos los filtros indicados.
+        Un filtro de años nunca incluye a los libros sin año.
+        """
+        igualdades = self._igualdades(autor, genero, leido)
+        if igualdades is None:
+            return []
+
+        posiciones = range(len(self))
+        for columna, valor in igualdades:
+            posiciones = [i for i in posiciones if columna[i] == valor]
+
+        if anio_desde is not None or anio_hasta is not None:
+            # SIN_ANIO es el menor valor posible: el límite inferior siempre lo deja afuera
+            desde = max(anio_desde, SIN_ANIO + 1) if anio_desde is not None else SIN_ANIO + 1
+            hasta = anio_hasta if anio_hasta is not None else 2**31 - 1
+            anio = self.anio
+            posiciones = [i for i in posiciones if desde <= anio[i] <= hasta]
+        return list(posiciones)
+
+    def contar(self, autor=None, genero=None, leido=None, anio_desde=None, anio_hasta=None):
+        """Cuenta los libros que cumplen los filtros (con un solo filtro de igualdad, sin recorrer en Python)."""
+        igualdades = self._igualdades(autor, genero, leido)
+        if igualdades is None:
+            return 0
+        if anio_desde is None and anio_hasta is None:
+            if not igualdades:
+                return len(self)
+            if len(igualdades) == 1:
+                columna, valor = igualdades[0]
+                return operator.countOf(columna, valor)
+        return len(self.filtrar(autor, genero, leido, anio_desde, anio_hasta))
+
+# --- Función Principal ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantánea columnar del catálogo de libros.")
+    parser.add_argument('--db', default=DB_NAME, help="Ruta de la base de datos SQLite.")
+    parser.add_argument('--archivo', default=ARCHIVO_INSTANTANEA, help="Ruta del archivo de la instantánea.")
+    parser.add_argument('--reconstruir', action='store_true', help="Vuelve a generar la instantánea desde la BD.")
+    parser.add_argument('--autor', help="Filtra por autor.")
+    parser.add_argument('--genero', help="Filtra por género.")
+    parser.add_argument('--leido', type=int, choices=(0, 1), help="Filtra por leído (1) o no leído (0).")
+    parser.add_argument('--desde', type=int, help="Año de publicación mínimo.")
+    parser.add_argument('--hasta', type=int, help="Año de publicación máximo.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    instantanea = None
+    if not args.reconstruir and os.path.exists(args.archivo):
+        try:
+            instantanea = Instantanea.cargar(args.archivo)
+        except ValueError as e:
+            print(f"⚠️ Advertencia: {e} Se regenera.")
+        else:
+            firma = firma_bd(args.db)
+            if firma is None:
+                print(f"⚠️ Advertencia: No existe '{args.db}'; se usa la instantánea tal como está.")
+            elif instantanea.firma != firma:
+                print(f"⚠️ '{args.db}' cambió desde que se generó la instantánea. Se regenera.")
+                instantanea = None
+
+    if instantanea is None:
+        instantanea = Instantanea.desde_bd(args.db)
+        instantanea.guardar(args.archivo)
+        print(f"✅ Instantánea generada desde '{args.db}' en {time.perf_counter() - inicio:.2f} s.")
+        instantanea = Instantanea.cargar(args.archivo)
+    else:
+        print(f"✅ Instantánea '{args.archivo}' cargada en {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+
+    inicio = time.perf_counter()
+    total = instantanea.contar(args.autor, args.genero, args.leido, args.desde, args.hasta)
+    print(f"{total} de {len(instantanea)} libros cumplen los filtros "
+          f"({(time.perf_counter() - inicio) * 1000:.1f} ms).")
+
+if __name__ == "__main__":
+    main()
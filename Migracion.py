@@ -0,0 +1,359 @@
+import sqlite3
+import argparse
+import os
+import time
+from Duplicados import asegurar_columna_clave
+
+# --- Configuración de la Migración ---
+DB_NAME = 'biblioteca_personal.db'
+TAMANIO_LOTE = 10000   # Filas copiadas por transacción
+
+# Esquema normalizado: 'autor' y 'genero' se guardan una sola vez en tablas de catálogo
+# y 'libros_datos' solo guarda sus IDs enteros.
+ESQUEMA_NORMALIZADO = [
+    """
+    CREATE TABLE IF NOT EXISTS autores (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL UNIQUE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS generos (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL UNIQUE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS libros_datos (
+        id INTEGER PRIMARY KEY,
+        titulo TEXT NOT NULL,
+        autor_id INTEGER NOT NULL REFERENCES autores(id),
+        anio_publicacion INTEGER,
+        genero_id INTEGER REFERENCES generos(id),
+        leido INTEGER DEFAULT 0, -- 0=No leído, 1=Leído
+        clave_bloqueo TEXT
+    );
+    """,
+    """
+    -- Progreso de la migración (permite reanudarla)
+    CREATE TABLE IF NOT EXISTS migracion_estado (
+        clave TEXT PRIMARY KEY,
+        valor INTEGER
+    );
+    """,
+    """
+    -- IDs de 'libros' modificados durante la migración (se vuelven a copiar antes de cada lote)
+    CREATE TABLE IF NOT EXISTS migracion_cambios (
+        id INTEGER PRIMARY KEY
+    );
+    """,
+    # Registran en 'migracion_cambios' toda escritura sobre la tabla antigua mientras sigue en uso
+    """
+    CREATE TRIGGER IF NOT EXISTS libros_migracion_insertar AFTER INSERT ON libros
+    BEGIN
+        INSERT OR IGNORE INTO migracion_cambios (id) VALUES (NEW.id);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS libros_migracion_actualizar AFTER UPDATE ON libros
+    BEGIN
+        INSERT OR IGNORE INTO migracion_cambios (id) VALUES (OLD.id);
+        INSERT OR IGNORE INTO migracion_cambios (id) VALUES (NEW.id);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS libros_migracion_eliminar AFTER DELETE ON libros
+    BEGIN
+        INSERT OR IGNORE INTO migracion_cambios (id) VALUES (OLD.id);
+    END;
+    """,
+]
+
+# Índices de 'libros_datos'. Un único índice (autor_id, genero_id) cubre las consultas a
+# través de la vista: el GROUP BY por autor recorre 'autores' en orden de nombre y cuenta
+# sus libros en el índice sin leer la tabla, y el filtro por género tampoco la lee.
+# Índices separados por autor y por género ocupaban más y obligaban a leer cada fila.
+INDICES_NORMALIZADOS = [
+    "DROP INDEX IF EXISTS idx_libros_datos_autor;",
+    "DROP INDEX IF EXISTS idx_libros_datos_genero;",
+    "CREATE INDEX IF NOT EXISTS idx_libros_datos_autor_genero ON libros_datos(autor_id, genero_id);",
+    "CREATE INDEX IF NOT EXISTS idx_libros_datos_clave_bloqueo ON libros_datos(clave_bloqueo);",
+]
+
+# Vista de compatibilidad con la forma antigua de 'libros' y triggers para que
+# Datos.py y Duplicados.py sigan insertando, actualizando y eliminando sin cambios.
+VISTA_COMPATIBILIDAD = [
+    """
+    CREATE VIEW libros AS
+    SELECT l.id, l.titulo, a.nombre AS autor, l.anio_publicacion,
+           g.nombre AS genero, l.leido, l.clave_bloqueo
+    FROM libros_datos l
+    JOIN autores a ON a.id = l.autor_id
+    LEFT JOIN generos g ON g.id = l.genero_id;
+    """,
+    """
+    CREATE TRIGGER libros_insertar INSTEAD OF INSERT ON libros
+    BEGIN
+        INSERT OR IGNORE INTO autores (nombre) VALUES (NEW.autor);
+        INSERT OR IGNORE INTO generos (nombre) SELECT NEW.genero WHERE NEW.genero IS NOT NULL;
+        INSERT INTO libros_datos (id, titulo, autor_id, anio_publicacion, genero_id, leido, clave_bloqueo)
+        VALUES (
+            NEW.id, NEW.titulo,
+            (SELECT id FROM autores WHERE nombre = NEW.autor),
+            NEW.anio_publicacion,
+            (SELECT id FROM generos WHERE nombre = NEW.genero),
+            COALESCE(NEW.leido, 0), NEW.clave_bloqueo
+        );
+    END;
+    """,
+    """
+    CREATE TRIGGER libros_actualizar INSTEAD OF UPDATE ON libros
+    BEGIN
+        INSERT OR IGNORE INTO autores (nombre) VALUES (NEW.autor);
+        INSERT OR IGNORE INTO generos (nombre) SELECT NEW.genero WHERE NEW.genero IS NOT NULL;
+        UPDATE libros_datos SET
+            id = NEW.id,
+            titulo = NEW.titulo,
+            autor_id = (SELECT id FROM autores WHERE nombre = NEW.autor),
+            anio_publicacion = NEW.anio_publicacion,
+            genero_id = (SELECT id FROM generos WHERE nombre = NEW.genero),
+            leido = NEW.leido,
+            clave_bloqueo = NEW.clave_bloqueo
+        WHERE id = OLD.id;
+    END;
+    """,
+    """
+    CREATE TRIGGER libros_eliminar INSTEAD OF DELETE ON libros
+    BEGIN
+        DELETE FROM libros_datos WHERE id = OLD.id;
+    END;
+    """,
+]
+
+# --- 1. Utilidades ---
+
+def tamanio_bd(conn):
+    """Retorna el tamaño en bytes ocupado por la base de datos (páginas * tamaño de página)."""
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    tamanio_pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+    return paginas * tamanio_pagina
+
+def tipo_de_libros(conn):
+    """Retorna 'table' si la base usa el esquema antiguo, 'view' si ya fue migrada o None."""
+    fila = conn.execute("SELECT type FROM sqlite_master WHERE name = 'libros'").fetchone()
+    return fila[0] if fila else None
+
+def valores_de_prueba(conn):
+    """Elige el autor y el género más frecuentes para que las mediciones filtren de verdad."""
+    autor = conn.execute(
+        "SELECT autor FROM libros GROUP BY autor ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    genero = conn.execute(
+        "SELECT genero FROM libros WHERE genero IS NOT NULL GROUP BY genero ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    return (autor[0] if autor else None), (genero[0] if genero else None)
+
+def medir_consultas(conn, autor, genero, repeticiones=5):
+    """
+    Mide (en milisegundos) las mismas consultas sobre 'libros', sea la tabla antigua o la
+    vista de compatibilidad, tal como las hacen las aplicaciones.
+    Retorna {consulta: (milisegundos, resultado ordenado)} para comparar que no cambie.
+    """
+    consultas = {
+        'GROUP BY autor': ("SELECT autor, COUNT(*) FROM libros GROUP BY autor", ()),
+        'filtro por genero': ("SELECT COUNT(*) FROM libros WHERE genero = ?", (genero,)),
+        'libros de un autor': ("SELECT id, titulo FROM libros WHERE autor = ?", (autor,)),
+    }
+
+    mediciones = {}
+    for nombre, (sql, parametros) in consultas.items():
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            resultado = conn.execute(sql, parametros).fetchall()
+        mediciones[nombre] = ((time.perf_counter() - inicio) * 1000 / repeticiones, sorted(resultado))
+    return mediciones
+
+# --- 2. Migración por Lotes ---
+
+def _ultimo_id_migrado(conn):
+    """Retorna el último ID copiado según 'migracion_estado' (0 si la migración es nueva)."""
+    fila = conn.execute("SELECT valor FROM migracion_estado WHERE clave = 'ultimo_id'").fetchone()
+    return fila[0] if fila else 0
+
+def _copiar_filas(conn, condicion, parametros):
+    """Copia al esquema normalizado las filas de 'libros' que cumplen 'condicion'. Retorna cuántas."""
+    conn.execute(
+        f"INSERT OR IGNORE INTO autores (nombre) SELECT DISTINCT autor FROM libros l WHERE {condicion}",
+        parametros
+    )
+    conn.execute(
+        f"""INSERT OR IGNORE INTO generos (nombre)
+            SELECT DISTINCT genero FROM libros l WHERE {condicion} AND genero IS NOT NULL""",
+        parametros
+    )
+    return conn.execute(
+        f"""INSERT INTO libros_datos (id, titulo, autor_id, anio_publicacion, genero_id, leido, clave_bloqueo)
+            SELECT l.id, l.titulo, a.id, l.anio_publicacion, g.id, l.leido, l.clave_bloqueo
+            FROM libros l
+            JOIN autores a ON a.nombre = l.autor
+            LEFT JOIN generos g ON g.nombre = l.genero
+            WHERE {condicion}""",
+        parametros
+    ).rowcount
+
+def _sincronizar_cambios(conn, ultimo_id):
+    """
+    Vuelve a copiar los libros ya migrados (id <= ultimo_id) que se insertaron, modificaron
+    o eliminaron en 'libros' después de copiarlos. Los de ID mayor se copiarán en su lote.
+    Retorna la variación en la cantidad de filas de 'libros_datos'.
+    """
+    cambiados = "id IN (SELECT id FROM migracion_cambios WHERE id <= ?)"
+    borradas = conn.execute(f"DELETE FROM libros_datos WHERE {cambiados}", (ultimo_id,)).rowcount
+    copiadas = _copiar_filas(conn, f"l.{cambiados}", (ultimo_id,))
+    conn.execute("DELETE FROM migracion_cambios")
+    return copiadas - borradas
+
+def _copiar_lote(conn, desde_id, hasta_id):
+    """
+    Sincroniza los cambios pendientes y copia las filas con desde_id < id <= hasta_id,
+    guardando el progreso. Retorna la variación en la cantidad de filas de 'libros_datos'.
+    """
+    copiadas = _sincronizar_cambios(conn, desde_id)
+    copiadas += _copiar_filas(conn, "l.id > ? AND l.id <= ?", (desde_id, hasta_id))
+    conn.execute(
+        "INSERT OR REPLACE INTO migracion_estado (clave, valor) VALUES ('ultimo_id', ?)", (hasta_id,)
+    )
+    return copiadas
+
+def migrar(conn, tamanio_lote=TAMANIO_LOTE):
+    """
+    Convierte la tabla 'libros' al esquema normalizado en lotes de 'tamanio_lote' filas.
+    Cada lote se confirma junto con su progreso, así que si se interrumpe basta con
+    volver a ejecutarla. Las aplicaciones pueden seguir escribiendo en 'libros' mientras
+    tanto: unos triggers registran los IDs modificados y se vuelven a copiar antes de cada
+    lote y en el reemplazo final por la vista de compatibilidad, que bloquea la escritura.
+    Retorna la variación en la cantidad de filas de 'libros_datos' en esta ejecución.
+    """
+    # Bases anteriores a la detección de duplicados no tienen 'clave_bloqueo'
+    asegurar_columna_clave(conn)
+    conn.execute("BEGIN")
+    for comando in ESQUEMA_NORMALIZADO + INDICES_NORMALIZADOS:
+        conn.execute(comando)
+    conn.commit()
+
+    ultimo_id = _ultimo_id_migrado(conn)
+    # Los conteos se hacen una sola vez; el progreso se lleva sumando lo copiado en cada lote
+    total = conn.execute("SELECT COUNT(*) FROM libros").fetchone()[0]
+    presentes = conn.execute("SELECT COUNT(*) FROM libros_datos").fetchone()[0]
+    copiadas = 0
+
+    while True:
+        hasta_id = conn.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM libros WHERE id > ? ORDER BY id LIMIT ?)",
+            (ultimo_id, tamanio_lote)
+        ).fetchone()[0]
+        if hasta_id is None:
+            break
+
+        try:
+            conn.execute("BEGIN")
+            copiadas += _copiar_lote(conn, ultimo_id, hasta_id)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        ultimo_id = hasta_id
+        progreso = (presentes + copiadas) * 100 / total if total else 100
+        print(f"  Lote copiado hasta ID {ultimo_id} ({min(progreso, 100):.1f}%).")
+
+    # Reemplazo final con la escritura bloqueada: sincroniza los cambios y copia lo
+    # insertado desde el último lote antes de eliminar la tabla (DROP también elimina sus triggers)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        hasta_id = conn.execute("SELECT MAX(id) FROM libros").fetchone()[0]
+        copiadas += _copiar_lote(conn, ultimo_id, max(hasta_id or 0, ultimo_id))
+        conn.execute("DROP TABLE libros")
+        for comando in VISTA_COMPATIBILIDAD:
+            conn.execute(comando)
+        conn.execute("DROP TABLE migracion_cambios")
+        conn.execute("DELETE FROM migracion_estado")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    return copiadas
+
+def ajustar_indices(conn):
+    """
+    Aplica INDICES_NORMALIZADOS a una base ya migrada (reemplaza índices de versiones
+    anteriores) y actualiza las estadísticas del planificador.
+    """
+    conn.execute("BEGIN")
+    for comando in INDICES_NORMALIZADOS:
+        conn.execute(comando)
+    conn.commit()
+    conn.execute("ANALYZE")
+
+# --- Función Principal ---
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migra 'libros' a un esquema con tablas 'autores' y 'generos' (reanudable)."
+    )
+    parser.add_argument('--db', default=DB_NAME, help="Ruta de la base de datos SQLite.")
+    parser.add_argument('--lote', type=int, default=TAMANIO_LOTE, help="Filas por transacción.")
+    parser.add_argument('--medir', action='store_true', help="Mide consultas por autor y género antes y después.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Error: No existe la base de datos '{args.db}'.")
+        return
+
+    # isolation_level=None: las transacciones se controlan explícitamente
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        tipo = tipo_de_libros(conn)
+        if tipo == 'view':
+            ajustar_indices(conn)
+            print("✅ La base de datos ya usa el esquema normalizado (índices verificados).")
+            return
+        if tipo is None:
+            print("❌ Error: La base de datos no tiene una tabla 'libros'.")
+            return
+
+        tamanio_antes = tamanio_bd(conn)
+        if args.medir:
+            # Mismos valores antes y después, elegidos sobre los datos reales
+            autor, genero = valores_de_prueba(conn)
+            mediciones_antes = medir_consultas(conn, autor, genero)
+
+        print(f"Migrando '{args.db}' en lotes de {args.lote} filas...")
+        inicio = time.perf_counter()
+        copiadas = migrar(conn, args.lote)
+        print(f"✅ {copiadas} libros migrados en {time.perf_counter() - inicio:.1f} s.")
+
+        # VACUUM libera las páginas de la tabla antigua; ANALYZE orienta al planificador en la vista
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+        tamanio_despues = tamanio_bd(conn)
+        variacion = (tamanio_despues / tamanio_antes - 1) * 100 if tamanio_antes else 0
+        print(f"Tamaño: {tamanio_antes / 1024:.0f} KiB -> {tamanio_despues / 1024:.0f} KiB "
+              f"({abs(variacion):.1f}% {'más' if variacion > 0 else 'menos'}).")
+
+        if args.medir:
+            mediciones_despues = medir_consultas(conn, autor, genero)
+            print(f"\n{'Consulta':<20} | {'Antes (ms)':>10} | {'Después (ms)':>12} | Resultado")
+            print("-" * 62)
+            for nombre, (antes, resultado) in mediciones_antes.items():
+                despues, resultado_despues = mediciones_despues[nombre]
+                estado = "igual" if resultado == resultado_despues else "⚠️ distinto"
+                print(f"{nombre:<20} | {antes:>10.1f} | {despues:>12.1f} | {estado}")
+    except sqlite3.Error as e:
+        print(f"❌ Error durante la migración (puede reanudarse ejecutándola de nuevo): {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
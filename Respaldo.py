@@ -0,0 +1,177 @@
+import sqlite3
+import argparse
+import glob
+import os
+import time
+from datetime import datetime
+
+# --- Configuración de los Respaldos ---
+BASES_DE_DATOS = ['biblioteca_personal.db', 'mundo_aventuras.db']
+DIRECTORIO_RESPALDOS = 'respaldos'
+PAGINAS_POR_PASO = 256   # Páginas copiadas antes de liberar el bloqueo de lectura
+PAUSA_ENTRE_PASOS = 0.05 # Segundos de espera entre pasos para no frenar a los escritores
+CONSERVAR = 7            # Cantidad de respaldos que se conservan por base de datos
+
+# --- 1. Copia en Línea ---
+
+def _ruta_respaldo(ruta_bd, directorio, sufijo=''):
+    """
+    Arma la ruta del respaldo, <directorio>/<nombre>-<fecha y hora con microsegundos><sufijo>.db,
+    y crea el archivo vacío de forma exclusiva: dos respaldos nunca comparten archivo y el
+    llamador sabe que ese archivo es suyo (VACUUM INTO acepta un destino vacío).
+    """
+    nombre = os.path.splitext(os.path.basename(ruta_bd))[0]
+    marca = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    ruta = os.path.join(directorio, f"{nombre}-{marca}{sufijo}.db")
+    contador = 0
+    while True:
+        try:
+            os.close(os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return ruta
+        except FileExistsError:
+            contador += 1
+            ruta = os.path.join(directorio, f"{nombre}-{marca}-{contador}{sufijo}.db")
+
+def respaldar_en_linea(ruta_bd, ruta_destino, paginas=PAGINAS_POR_PASO, pausa=PAUSA_ENTRE_PASOS):
+    """
+    Copia la base de datos con la API de respaldo de SQLite, 'paginas' páginas por paso.
+    Entre pasos se libera el bloqueo y se espera 'pausa' segundos, así las aplicaciones
+    pueden seguir escribiendo. Si otro proceso escribe durante la copia, SQLite la
+    reinicia (en modo WAL esto ocurre con mucha menos frecuencia).
+    Retorna las páginas copiadas.
+    """
+    origen = sqlite3.connect(ruta_bd)
+    destino = sqlite3.connect(ruta_destino)
+    total = 0
+
+    def progreso(estado, restantes, total_paginas):
+        nonlocal total
+        total = total_paginas
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    try:
+        origen.backup(destino, pages=paginas, progress=progreso)
+    finally:
+        destino.close()
+        origen.close()
+    return total
+
+def respaldar_compactado(ruta_bd, ruta_destino):
+    """
+    Genera una instantánea compactada con 'VACUUM INTO' (sin páginas libres).
+    Retorna las páginas del archivo resultante.
+    """
+    origen = sqlite3.connect(ruta_bd)
+    try:
+        origen.execute("VACUUM INTO ?", (ruta_destino,))
+    finally:
+        origen.close()
+
+    destino = sqlite3.connect(ruta_destino)
+    try:
+        return destino.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        destino.close()
+
+# --- 2. Verificación y Rotación ---
+
+def verificar_integridad(ruta):
+    """Ejecuta 'PRAGMA integrity_check' sobre el respaldo. Retorna True si está íntegro."""
+    conn = sqlite3.connect(ruta)
+    try:
+        resultado = conn.execute("PRAGMA integrity_check").fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ Error al verificar '{ruta}': {e}")
+        return False
+    finally:
+        conn.close()
+    return resultado == [('ok',)]
+
+def rotar_respaldos(ruta_bd, directorio, conservar=CONSERVAR):
+    """
+    Elimina los respaldos más antiguos de 'ruta_bd' dejando solo los 'conservar' (al menos 1)
+    más recientes.
+    """
+    if conservar < 1:
+        raise ValueError("Se debe conservar al menos un respaldo.")
+    nombre = os.path.splitext(os.path.basename(ruta_bd))[0]
+    # El nombre incluye la fecha en formato ordenable, así que el orden alfabético es cronológico
+    respaldos = sorted(glob.glob(os.path.join(directorio, f"{nombre}-????????-??????*.db")))
+    eliminados = respaldos[:-conservar]
+    for ruta in eliminados:
+        os.remove(ruta)
+    return eliminados
+
+# --- 3. Respaldo Completo de una Base ---
+
+def respaldar(ruta_bd, directorio=DIRECTORIO_RESPALDOS, paginas=PAGINAS_POR_PASO,
+              pausa=PAUSA_ENTRE_PASOS, compactar=False, conservar=CONSERVAR):
+    """Respalda, verifica y rota una base de datos, mostrando el reporte de la operación."""
+    if not os.path.exists(ruta_bd):
+        print(f"⚠️ Advertencia: No existe la base de datos '{ruta_bd}'. Se omite.")
+        return False
+
+    os.makedirs(directorio, exist_ok=True)
+    # Archivo nuevo creado por esta llamada: es el único que se elimina si algo falla
+    ruta_destino = _ruta_respaldo(ruta_bd, directorio, '-vacuum' if compactar else '')
+
+    print(f"\n--- 💾 RESPALDO DE '{ruta_bd}' ---")
+    inicio = time.perf_counter()
+    try:
+        if compactar:
+            total_paginas = respaldar_compactado(ruta_bd, ruta_destino)
+        else:
+            total_paginas = respaldar_en_linea(ruta_bd, ruta_destino, paginas, pausa)
+    except sqlite3.Error as e:
+        print(f"❌ Error al respaldar '{ruta_bd}': {e}")
+        os.remove(ruta_destino)
+        return False
+    duracion = time.perf_counter() - inicio
+
+    if not verificar_integridad(ruta_destino):
+        print(f"❌ El respaldo '{ruta_destino}' no pasó la verificación de integridad. Se elimina.")
+        os.remove(ruta_destino)
+        return False
+
+    tamanio = os.path.getsize(ruta_destino)
+    print(f"✅ Respaldo creado: {ruta_destino}")
+    print(f"Páginas copiadas: {total_paginas} ({tamanio / 1024:.0f} KiB)")
+    print(f"Duración: {duracion:.2f} s | Rendimiento: "
+          f"{total_paginas / duracion if duracion else 0:.0f} páginas/s, "
+          f"{tamanio / (1024 * 1024) / duracion if duracion else 0:.1f} MiB/s")
+    print("Integridad: ok")
+
+    for ruta in rotar_respaldos(ruta_bd, directorio, conservar):
+        print(f"🗑️ Respaldo antiguo eliminado: {ruta}")
+    return True
+
+# --- Función Principal ---
+
+def _entero_positivo(texto):
+    """Tipo de argparse para enteros mayores o iguales a 1."""
+    valor = int(texto)
+    if valor < 1:
+        raise argparse.ArgumentTypeError("debe ser al menos 1")
+    return valor
+
+def main():
+    parser = argparse.ArgumentParser(description="Respaldo en línea de las bases de datos SQLite.")
+    parser.add_argument('bases', nargs='*', default=BASES_DE_DATOS, help="Bases de datos a respaldar.")
+    parser.add_argument('--destino', default=DIRECTORIO_RESPALDOS, help="Directorio de los respaldos.")
+    parser.add_argument('--paginas', type=int, default=PAGINAS_POR_PASO, help="Páginas copiadas por paso.")
+    parser.add_argument('--pausa', type=float, default=PAUSA_ENTRE_PASOS, help="Segundos de espera entre pasos.")
+    parser.add_argument('--vacuum', action='store_true', help="Genera una instantánea compactada con VACUUM INTO.")
+    parser.add_argument('--conservar', type=_entero_positivo, default=CONSERVAR,
+                        help="Respaldos más recientes que se conservan por base (al menos 1).")
+    args = parser.parse_args()
+
+    resultados = [
+        respaldar(ruta, args.destino, args.paginas, args.pausa, args.vacuum, args.conservar)
+        for ruta in args.bases
+    ]
+    if not all(resultados):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
-import pymongo
-# Se usa ConnectionFailure ya que ConnectionError causa el ImportError
-from pymongo.errors import ConnectionFailure, OperationFailure 
 import os
 import sys 
+from Duplicados import clave_bloqueo, normalizar_texto, normalizar_autor, similitud, UMBRAL_SIMILITUD
 
 # --- 1. Configuración de la Base de Datos MongoDB ---
 # Usaremos una variable de entorno para la URI, si no está configurada, usa la local por defecto
@@ -10,9 +8,24 @@ MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
 DB_NAME = 'biblioteca_nosql'
 COLLECTION_NAME = 'libros'
 
+# Índices que usan la detección de duplicados y los reportes de agregación
+INDICES = {
+    'clave_bloqueo_1': [('clave_bloqueo', 1)],
+    'leido_1_genero_1': [('leido', 1), ('genero', 1)],
+    'autor_1_anio_publicacion_1': [('autor', 1), ('anio_publicacion', 1)],
+}
+
 # --- 2. Conexión y Cliente ---
+# pymongo se importa y la conexión se abre recién en la primera operación: importar este
+# módulo o mostrar el menú no paga el costo del driver ni del 'ping' al servidor.
+_libros_collection = None
+
 def get_mongo_collection():
     """Establece la conexión a MongoDB y retorna la colección 'libros'."""
+    import pymongo
+    # Se usa ConnectionFailure ya que ConnectionError causa el ImportError
+    from pymongo.errors import ConnectionFailure, OperationFailure
+
     try:
         # 1. Crear el cliente
         # Ajuste: El serverSelectionTimeoutMS previene que la aplicación se congele indefinidamente si falla la conexión.
@@ -24,6 +37,8 @@ def get_mongo_collection():
         # 3. Seleccionar la base de datos y la colección
         db = client[DB_NAME]
         collection = db[COLLECTION_NAME]
+        ensure_indexes(collection)
+        actualizar_claves(collection)
         
         print(f"✅ Conexión a MongoDB exitosa. Usando colección '{COLLECTION_NAME}'.")
         return collection
@@ -40,7 +55,38 @@ def get_mongo_collection():
         sys.exit(1)
 
 
-libros_collection = get_mongo_collection()
+def ensure_indexes(collection):
+    """Crea los índices de INDICES si no existen (create_index no hace nada si ya están)."""
+    for nombre, claves in INDICES.items():
+        collection.create_index(claves, name=nombre)
+
+def actualizar_claves(collection, todas=False, tamanio_lote=1000):
+    """
+    Calcula la clave de bloqueo de los libros que no la tienen (o de todos si 'todas'),
+    así la advertencia de duplicados también encuentra los libros cargados antes de ella.
+    Retorna la cantidad de libros actualizados.
+    """
+    from pymongo import UpdateOne
+
+    filtro = {} if todas else {"clave_bloqueo": None}
+    actualizados = 0
+    lote = []
+    for libro in collection.find(filtro, {"titulo": 1, "autor": 1}):
+        clave = clave_bloqueo(libro.get("titulo"), libro.get("autor"))
+        lote.append(UpdateOne({"_id": libro["_id"]}, {"$set": {"clave_bloqueo": clave}}))
+        if len(lote) >= tamanio_lote:
+            actualizados += collection.bulk_write(lote, ordered=False).modified_count
+            lote = []
+    if lote:
+        actualizados += collection.bulk_write(lote, ordered=False).modified_count
+    return actualizados
+
+def get_libros_collection():
+    """Retorna la colección 'libros', conectándose a MongoDB solo la primera vez."""
+    global _libros_collection
+    if _libros_collection is None:
+        _libros_collection = get_mongo_collection()
+    return _libros_collection
 
 
 # --- 3. Funciones de la Biblioteca (CRUD y Validaciones) ---
@@ -71,10 +117,28 @@ def agregar_libro():
         "autor": autor,
         "anio_publicacion": anio,
         "genero": genero if genero else None,
-        "leido": False 
+        "leido": False,
+        "clave_bloqueo": clave_bloqueo(titulo, autor)
     }
     
+    libros_collection = get_libros_collection()
+    from pymongo.errors import OperationFailure
+
     try:
+        # Advertencia de posibles duplicados (búsqueda por la clave de bloqueo indexada)
+        nuevo = (normalizar_texto(titulo), normalizar_autor(autor))
+        similares = [
+            libro for libro in libros_collection.find({"clave_bloqueo": nuevo_libro["clave_bloqueo"]})
+            if similitud(nuevo, (normalizar_texto(libro['titulo']), normalizar_autor(libro['autor']))) >= UMBRAL_SIMILITUD
+        ]
+        if similares:
+            print("\n⚠️ Advertencia: Ya existen libros muy parecidos:")
+            for libro in similares:
+                print(f"  {str(libro['_id'])[-5:]:<7} | {libro['titulo'][:35]:<35} | {libro['autor'][:25]}")
+            if input("¿Agregarlo de todas formas? (s/N): ").strip().lower() != 's':
+                print("Operación cancelada.")
+                return
+
         resultado = libros_collection.insert_one(nuevo_libro)
         print(f"\n✅ Libro '{titulo}' de {autor} agregado exitosamente (ID: {resultado.inserted_id}).")
     except OperationFailure as e:
@@ -82,8 +146,10 @@ def agregar_libro():
 
 def listar_libros():
     """Muestra todos los documentos (libros) en la colección."""
-    
-    libros_cursor = libros_collection.find().sort("_id", pymongo.DESCENDING)
+    libros_collection = get_libros_collection()
+    from pymongo import DESCENDING
+
+    libros_cursor = libros_collection.find().sort("_id", DESCENDING)
     libros = list(libros_cursor) 
     
     # Validación 3: Búsquedas sin resultados
@@ -115,6 +181,9 @@ def marcar_como_leido():
         print("❌ Error: El ID no puede estar vacío.")
         return
 
+    libros_collection = get_libros_collection()
+    from pymongo.errors import OperationFailure
+
     try:
         libro = libros_collection.find_one({"_id": {"$regex": f".*{id_str}$"}})
         
@@ -143,6 +212,9 @@ def eliminar_libro():
         print("❌ Error: El ID no puede estar vacío.")
         return
 
+    libros_collection = get_libros_collection()
+    from pymongo.errors import OperationFailure
+
     try:
         libro = libros_collection.find_one({"_id": {"$regex": f".*{id_str}$"}})
 
@@ -160,6 +232,143 @@ def eliminar_libro():
     except OperationFailure as e:
         print(f"❌ Error al eliminar el libro: {e}")
 
+# --- 4. Reportes (Pipelines de Agregación) ---
+# Los conteos se hacen en el servidor. Cada pipeline empieza con un $match sobre el prefijo
+# de un índice compuesto y solo usa campos de ese índice, así MongoDB puede resolverlo
+# recorriendo el índice sin leer los documentos.
+
+def pipeline_por_genero():
+    """Libros y libros leídos por género (índice leido_1_genero_1)."""
+    return [
+        {"$match": {"leido": {"$in": [True, False]}}},
+        {"$group": {
+            "_id": "$genero",
+            "total": {"$sum": 1},
+            "leidos": {"$sum": {"$cond": ["$leido", 1, 0]}},
+        }},
+        {"$sort": {"total": -1}},
+    ]
+
+def pipeline_por_autor(limite=20):
+    """Autores con más libros (índice autor_1_anio_publicacion_1)."""
+    return [
+        {"$match": {"autor": {"$type": "string"}}},
+        {"$group": {"_id": "$autor", "total": {"$sum": 1}}},
+        {"$sort": {"total": -1, "_id": 1}},
+        {"$limit": limite},
+    ]
+
+def pipeline_proporcion_leidos():
+    """Total de libros y cuántos están leídos (índice leido_1_genero_1)."""
+    return [
+        {"$match": {"leido": {"$in": [True, False]}}},
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "leidos": {"$sum": {"$cond": ["$leido", 1, 0]}},
+        }},
+    ]
+
+def pipeline_histograma_decadas(autor=None):
+    """Libros por década de publicación, opcionalmente de un autor (índice autor_1_anio_publicacion_1)."""
+    return [
+        {"$match": {
+            "autor": autor if autor else {"$type": "string"},
+            "anio_publicacion": {"$type": "number"},
+        }},
+        {"$group": {
+            "_id": {"$multiply": [{"$floor": {"$divide": ["$anio_publicacion", 10]}}, 10]},
+            "total": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+# Reporte -> (pipeline, índice que debería usar)
+REPORTES = {
+    'Libros por género': (pipeline_por_genero, 'leido_1_genero_1'),
+    'Libros por autor': (pipeline_por_autor, 'autor_1_anio_publicacion_1'),
+    'Proporción de leídos': (pipeline_proporcion_leidos, 'leido_1_genero_1'),
+    'Histograma por década': (pipeline_histograma_decadas, 'autor_1_anio_publicacion_1'),
+}
+
+def mostrar_reportes():
+    """Ejecuta los pipelines de agregación y muestra sus resultados."""
+    libros_collection = get_libros_collection()
+    from pymongo.errors import OperationFailure
+
+    try:
+        resumen = list(libros_collection.aggregate(pipeline_proporcion_leidos()))
+        if not resumen:
+            print("\n--- 📚 BIBLIOTECA VACÍA ---")
+            print("Aún no tienes libros registrados. Usa la opción 1 para agregar uno.")
+            return
+
+        total, leidos = resumen[0]['total'], resumen[0]['leidos']
+        print("\n--- 📊 REPORTES DE LA BIBLIOTECA (MongoDB) ---")
+        print(f"Libros: {total} | Leídos: {leidos} ({leidos * 100 / total:.1f}%)")
+
+        print(f"\n{'Género':<30} | {'Total':>6} | {'Leídos':>6}")
+        print("-" * 48)
+        for fila in libros_collection.aggregate(pipeline_por_genero()):
+            print(f"{(fila['_id'] or 'Sin género')[:30]:<30} | {fila['total']:>6} | {fila['leidos']:>6}")
+
+        print(f"\n{'Autor':<30} | {'Total':>6}")
+        print("-" * 39)
+        for fila in libros_collection.aggregate(pipeline_por_autor()):
+            print(f"{fila['_id'][:30]:<30} | {fila['total']:>6}")
+
+        print(f"\n{'Década':<8} | {'Total':>6}")
+        print("-" * 17)
+        for fila in libros_collection.aggregate(pipeline_histograma_decadas()):
+            print(f"{int(fila['_id']):<8} | {fila['total']:>6} {'#' * min(fila['total'], 40)}")
+    except OperationFailure as e:
+        print(f"❌ Error al generar los reportes: {e}")
+
+def _indices_usados(plan):
+    """
+    Recorre un plan de 'explain' y retorna los índices usados por etapas de índice
+    (sin contar los planes que el optimizador descartó).
+    """
+    usados = set()
+    if isinstance(plan, dict):
+        if plan.get('stage') in ('IXSCAN', 'DISTINCT_SCAN', 'COUNT_SCAN') and 'indexName' in plan:
+            usados.add(plan['indexName'])
+        for clave, valor in plan.items():
+            if clave != 'rejectedPlans':
+                usados |= _indices_usados(valor)
+    elif isinstance(plan, list):
+        for valor in plan:
+            usados |= _indices_usados(valor)
+    return usados
+
+def verificar_indices():
+    """Usa 'explain' para comprobar que cada reporte se resuelve con su índice. Retorna True si todos lo usan."""
+    libros_collection = get_libros_collection()
+    from pymongo.errors import OperationFailure
+
+    print("\n--- 🔍 VERIFICACIÓN DE ÍNDICES (explain) ---")
+    todos_ok = True
+    for nombre, (pipeline, indice) in REPORTES.items():
+        try:
+            plan = libros_collection.database.command(
+                'aggregate', libros_collection.name, pipeline=pipeline(), explain=True
+            )
+        except OperationFailure as e:
+            print(f"❌ {nombre}: error al ejecutar explain ({e})")
+            todos_ok = False
+            continue
+
+        usados = _indices_usados(plan)
+        if indice in usados:
+            print(f"✅ {nombre}: usa el índice '{indice}'.")
+        else:
+            todos_ok = False
+            detalle = ', '.join(sorted(usados)) if usados else 'recorrido completo (COLLSCAN)'
+            print(f"❌ {nombre}: no usa '{indice}' ({detalle}).")
+    return todos_ok
+
+# --- 5. Interfaz de Usuario (Menú) ---
+
 def mostrar_menu():
     print("\n" + "="*38)
     print("  ADMINISTRADOR DE BIBLIOTECA (MongoDB)")
@@ -169,12 +378,14 @@ def mostrar_menu():
     print("3. Marcar libro como leído")
     print("4. Eliminar libro por ID (últimos 5 dígitos)")
     print("5. Salir")
+    print("6. Reportes (agregaciones)")
+    print("7. Verificar uso de índices")
     print("-" * 38)
 
 def main():
     while True:
         mostrar_menu()
-        opcion = input("Selecciona una opción (1-5): ").strip()
+        opcion = input("Selecciona una opción (1-7): ").strip()
         
         if opcion == '1':
             agregar_libro()
@@ -187,12 +398,15 @@ def main():
         elif opcion == '5':
             print("👋 Gracias por usar la Biblioteca CLI con MongoDB.")
             break
+        elif opcion == '6':
+            mostrar_reportes()
+        elif opcion == '7':
+            verificar_indices()
         else:
-            print("❌ Opción no válida. Por favor, selecciona un número entre 1 y 5.")
+            print("❌ Opción no válida. Por favor, selecciona un número entre 1 y 7.")
         
         input("\nPresiona Enter para continuar...")
         os.system('cls' if os.name == 'nt' else 'clear')
 
 if __name__ == "__main__":
-    if libros_collection: # Asegura que la aplicación solo corra si la conexión fue exitosa
-        main()   
\ No newline at end of file
+    main()   
\ No newline at end of file
@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+import pytest
+
+import Carga
+import Datos
+
+
+def test_no_elimina_bases_ajenas(tmp_path):
+    with pytest.raises(ValueError):
+        Carga.verificar_ruta_carga(Datos.DB_NAME)
+
+    ajena = str(tmp_path / 'ajena.db')
+    Datos.crear_tabla(ajena)
+    with pytest.raises(ValueError):
+        Carga.preparar_bd(ajena, 'delete', 10)
+    conn = Datos.get_db_connection(ajena)
+    assert conn.execute("SELECT COUNT(*) FROM libros").fetchone()[0] == 0
+    conn.close()
+
+
+def test_cliente_reinserta_ids_eliminados(tmp_path):
+    ruta = str(tmp_path / 'carga.db')
+    Carga.preparar_bd(ruta, 'truncate', 20)
+    Carga.preparar_bd(ruta, 'truncate', 20)   # Una base de carga sí se puede recrear
+
+    mezcla = {'insercion': 1, 'eliminacion': 1}
+    registros = Carga.cliente(0, ruta, 'truncate', 'off', mezcla, 20, 0.0, time.time(), 0.2, 1.0)
+    eliminados = sum(1 for r in registros if r[1] == 'eliminacion' and r[6])
+    insertados = sum(1 for r in registros if r[1] == 'insercion')
+
+    conn = sqlite3.connect(ruta)
+    vivos = conn.execute("SELECT COUNT(*), MAX(id) FROM libros").fetchone()
+    conn.close()
+    assert vivos[0] == 20 - eliminados + insertados
+    # Las inserciones reutilizan primero los IDs eliminados
+    assert eliminados and vivos[1] < 20 + insertados
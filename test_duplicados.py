@@ -0,0 +1,131 @@
+import sqlite3
+
+import pytest
+
+import Datos
+import Duplicados
+from Duplicados import (
+    _agrupar_bloque, actualizar_claves, buscar_grupos_duplicados, clave_bloqueo, fusionar_grupos,
+    normalizar_autor, normalizar_texto, similitud,
+)
+
+
+def _libro(titulo, autor):
+    return normalizar_texto(titulo), normalizar_autor(autor)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    ruta = str(tmp_path / 'biblioteca.db')
+    Datos.crear_tabla(ruta)
+    conexion = sqlite3.connect(ruta)
+    yield conexion
+    conexion.close()
+
+
+def test_clave_estable_entre_formatos_del_autor():
+    claves = {
+        clave_bloqueo('Cien años de soledad', autor)
+        for autor in ('Gabriel García Márquez', 'García Márquez', 'G. Garcia Marquez',
+                      'García Márquez, Gabriel')
+    }
+    assert claves == {'marque:cien'}
+
+
+def test_numeros_distintos_no_son_duplicados():
+    assert similitud(_libro('Tomo 1', 'Autor'), _libro('Tomo 2', 'Autor')) == 0.0
+    assert similitud(_libro('Dune II', 'Herbert'), _libro('Dune III', 'Herbert')) == 0.0
+    assert similitud(_libro('Tomo 1', 'Autor'), _libro('Tomo 1.', 'Autor')) == 1.0
+
+
+@pytest.mark.parametrize('titulo_a, titulo_b, autor', [
+    ('Historia de España', 'Historia de Francia', 'Anónimo'),
+    ('Obras completas tomo primero', 'Obras completas tomo segundo', 'Jorge Luis Borges'),
+])
+def test_palabra_reemplazada_no_es_duplicado(titulo_a, titulo_b, autor):
+    assert clave_bloqueo(titulo_a, autor) == clave_bloqueo(titulo_b, autor)
+    assert similitud(_libro(titulo_a, autor), _libro(titulo_b, autor)) == 0.0
+
+
+def test_erratas_siguen_siendo_duplicados():
+    autor = 'Gabriel García Márquez'
+    assert similitud(_libro('Cien años de soledad', autor), _libro('Cien años de soledda', autor)) >= 0.85
+    assert similitud(_libro('Don Quijote de la Mancha', 'Cervantes'),
+                     _libro('Don Quixote de la Mancha', 'Cervantes')) >= 0.85
+
+
+def test_bloque_grande_usa_ventana():
+    # Sobre MAX_BLOQUE se compara por ventanas: a lo sumo n * VENTANA comparaciones, en vez
+    # de n² / 2. Medido con 2000 títulos parecidos: ~2.4 s con ventana, ~30 s todos contra todos.
+    filas = [(i, f"la historia de la casa {i:x} del viento", 'anonimo')
+             for i in range(Duplicados.MAX_BLOQUE * 4)]
+    _, comparaciones = _agrupar_bloque(filas, 0.85)
+    assert comparaciones <= len(filas) * Duplicados.VENTANA < len(filas) ** 2 // 2
+
+
+def test_umbral_bajo_no_descarta_pares_validos():
+    # Título con ratio 0.30: con el mismo autor el puntaje (0.51) supera un umbral de 0.5
+    a, b = _libro('Emma', 'Jane Austen'), _libro('Emma: una novela clásica', 'Jane Austen')
+    assert similitud(a, b, umbral=0.5) >= 0.5
+
+
+def test_grupos_no_se_encadenan():
+    # Cada título se parece al siguiente, pero el último no se parece al primero
+    filas = [
+        (1, 'abcdefghijklmnopqrst', 'autor'), (2, 'abcdefghijklmnopqrzz', 'autor'),
+        (3, 'abcdefghijklmnopzzzz', 'autor'), (4, 'abcdefghijklmnzzzzzz', 'autor'),
+    ]
+    assert similitud(filas[0][1:], filas[3][1:]) < 0.85
+    grupos, _ = _agrupar_bloque(filas, 0.85)
+    assert grupos == [[1, 2, 3]]
+
+
+def test_titulos_numerados_no_se_fusionan(conn):
+    for i in range(30):
+        Datos.insertar_libro(conn, f"Título {i:02d}", 'Autor Repetido')
+    conn.commit()
+    grupos, _ = buscar_grupos_duplicados(conn)
+    assert grupos == []
+
+
+def test_cada_miembro_se_parece_al_conservado(conn):
+    for titulo in ('Rayuela', 'Rayuela.', 'Rayuela (ed. 1963)', 'Rayuelas'):
+        Datos.insertar_libro(conn, titulo, 'Julio Cortázar')
+    conn.commit()
+    grupos, _ = buscar_grupos_duplicados(conn)
+    filas = dict(conn.execute("SELECT id, titulo FROM libros"))
+    for ids in grupos:
+        conservado = _libro(filas[ids[0]], 'Julio Cortázar')
+        for otro in ids[1:]:
+            assert similitud(conservado, _libro(filas[otro], 'Julio Cortázar')) >= 0.85
+
+
+def test_fusion_conserva_datos_y_elimina_sobrantes(conn):
+    Datos.insertar_libro(conn, 'Rayuela', 'Julio Cortázar')
+    Datos.insertar_libro(conn, 'Rayuela.', 'Cortázar, Julio', 1963, 'Novela')
+    conn.execute("UPDATE libros SET leido = 1 WHERE id = 2")
+    conn.commit()
+    grupos, _ = buscar_grupos_duplicados(conn)
+    assert grupos == [[1, 2]]
+    assert fusionar_grupos(conn, grupos) == 1
+    assert conn.execute(
+        "SELECT id, anio_publicacion, genero, leido FROM libros"
+    ).fetchall() == [(1, 1963, 'Novela', 1)]
+
+
+def test_crear_tabla_completa_claves_existentes(tmp_path):
+    ruta = str(tmp_path / 'antigua.db')
+    antigua = sqlite3.connect(ruta)
+    antigua.execute("""
+        CREATE TABLE libros (id INTEGER PRIMARY KEY, titulo TEXT NOT NULL, autor TEXT NOT NULL,
+                             anio_publicacion INTEGER, genero TEXT, leido INTEGER DEFAULT 0)
+    """)
+    antigua.execute("INSERT INTO libros (titulo, autor) VALUES ('Ficciones', 'Jorge Luis Borges')")
+    antigua.commit()
+    antigua.close()
+
+    Datos.crear_tabla(ruta)
+    conexion = sqlite3.connect(ruta)
+    assert conexion.execute("SELECT clave_bloqueo FROM libros").fetchone() == ('borges:ficc',)
+    assert actualizar_claves(conexion) == 0
+    conexion.close()
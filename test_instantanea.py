@@ -0,0 +1,55 @@
+import sqlite3
+
+import Datos
+from Instantanea import Instantanea, firma_bd
+
+
+def _crear_bd(tmp_path):
+    ruta = str(tmp_path / 'biblioteca.db')
+    Datos.crear_tabla(ruta)
+    conn = sqlite3.connect(ruta)
+    Datos.insertar_libro(conn, 'Ficciones', 'Jorge Luis Borges', 1944, 'Cuentos')
+    Datos.insertar_libro(conn, 'Crónica del futuro', 'Anónimo', 40000)
+    conn.commit()
+    conn.close()
+    return ruta
+
+
+def test_anios_fuera_de_int16_y_firma(tmp_path):
+    ruta = _crear_bd(tmp_path)
+    archivo = str(tmp_path / 'biblioteca.snap')
+    Instantanea.desde_bd(ruta).guardar(archivo)
+
+    instantanea = Instantanea.cargar(archivo)
+    assert [libro.anio_publicacion for libro in instantanea] == [1944, 40000]
+    assert instantanea.contar(anio_desde=33000) == 1
+    assert instantanea.firma == firma_bd(ruta)
+
+
+def test_firma_cambia_al_escribir(tmp_path):
+    ruta = _crear_bd(tmp_path)
+    antes = firma_bd(ruta)
+    conn = sqlite3.connect(ruta)
+    Datos.actualizar_leido(conn, 1)
+    conn.commit()
+    conn.close()
+    assert firma_bd(ruta) != antes
+
+
+def test_anios_negativos_cero_y_nulos(tmp_path):
+    ruta = str(tmp_path / 'biblioteca.db')
+    Datos.crear_tabla(ruta)
+    conn = sqlite3.connect(ruta)
+    for titulo, anio in (('Ilíada', -750), ('Año cero', 0), ('Sin fecha', None), ('Ficciones', 1944)):
+        Datos.insertar_libro(conn, titulo, 'Autor', anio)
+    conn.commit()
+    conn.close()
+
+    archivo = str(tmp_path / 'biblioteca.snap')
+    Instantanea.desde_bd(ruta).guardar(archivo)
+    instantanea = Instantanea.cargar(archivo)
+    assert [libro.anio_publicacion for libro in instantanea] == [-750, 0, None, 1944]
+    # Solo límite superior: incluye los años a.C. y el año 0, nunca los libros sin año
+    assert instantanea.filtrar(anio_hasta=0) == [0, 1]
+    assert instantanea.contar(anio_desde=0) == 2
+    assert instantanea.contar() == 4
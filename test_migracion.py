@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+import Datos
+import Migracion
+
+
+class Interrupcion(Exception):
+    pass
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    ruta = str(tmp_path / 'biblioteca.db')
+    Datos.crear_tabla(ruta)
+    conn = sqlite3.connect(ruta)
+    for i in range(500):
+        Datos.insertar_libro(conn, f"Libro {i}", f"Autor {i % 17}", 1990 + i % 30, f"Género {i % 4}")
+    conn.commit()
+    conn.close()
+    return ruta
+
+
+def test_cambios_durante_la_migracion_no_se_pierden(ruta, monkeypatch):
+    otra = sqlite3.connect(ruta)
+    lotes = []
+
+    def escribir_entre_lotes(*args):
+        # Modifica filas ya copiadas y todavía sin copiar; interrumpe en el tercer lote
+        lotes.append(args)
+        n = len(lotes)
+        otra.execute("UPDATE libros SET leido = 1, autor = ? WHERE id = ?", (f"Otro {n}", n * 10))
+        otra.execute("DELETE FROM libros WHERE id = ?", (n * 10 + 1,))
+        otra.execute("INSERT INTO libros (titulo, autor) VALUES (?, 'Nuevo')", (f"Nuevo {n}",))
+        otra.commit()
+        if n == 3:
+            raise Interrupcion
+
+    monkeypatch.setattr(Migracion, 'print', escribir_entre_lotes, raising=False)
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    with pytest.raises(Interrupcion):
+        Migracion.migrar(conn, 50)
+
+    # Escrituras entre la interrupción y la reanudación
+    otra.execute("UPDATE libros SET titulo = 'Reescrito' WHERE id = 5")
+    otra.execute("DELETE FROM libros WHERE id = 7")
+    otra.commit()
+    esperado = sorted(otra.execute("SELECT * FROM libros"))
+    otra.close()
+
+    monkeypatch.setattr(Migracion, 'print', lambda *args: None, raising=False)
+    Migracion.migrar(conn, 50)
+    assert Migracion.tipo_de_libros(conn) == 'view'
+    assert sorted(conn.execute("SELECT * FROM libros")) == esperado
+    conn.close()
+
+
+def test_consultas_iguales_antes_y_despues(ruta):
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    autor, genero = Migracion.valores_de_prueba(conn)
+    antes = Migracion.medir_consultas(conn, autor, genero, repeticiones=1)
+    Migracion.migrar(conn, 100)
+    despues = Migracion.medir_consultas(conn, autor, genero, repeticiones=1)
+    for nombre, (_, resultado) in antes.items():
+        assert resultado and resultado == despues[nombre][1]
+    conn.close()
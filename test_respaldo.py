@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import Respaldo
+
+
+@pytest.fixture
+def bd(tmp_path):
+    ruta = str(tmp_path / 'b.db')
+    conn = sqlite3.connect(ruta)
+    conn.execute("CREATE TABLE libros (id INTEGER PRIMARY KEY, titulo TEXT)")
+    conn.executemany("INSERT INTO libros (titulo) VALUES (?)", [(f"Libro {i}",) for i in range(100)])
+    conn.commit()
+    conn.close()
+    return ruta
+
+
+@pytest.fixture
+def mismo_instante(monkeypatch):
+    """Congela la hora para que todos los respaldos pidan el mismo nombre."""
+    class Reloj(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 1, 2, 3, 4, 5, 678901)
+    monkeypatch.setattr(Respaldo, 'datetime', Reloj)
+
+
+def _respaldos(directorio):
+    return sorted(os.listdir(directorio))
+
+
+def test_rotacion_conserva_los_mas_recientes(tmp_path, bd):
+    directorio = tmp_path / 'respaldos'
+    directorio.mkdir()
+    nombres = [f"b-2026010{dia}-120000-000000.db" for dia in range(1, 6)]
+    for nombre in nombres:
+        (directorio / nombre).write_bytes(b'')
+    (directorio / 'otra-20260101-120000-000000.db').write_bytes(b'')
+
+    eliminados = Respaldo.rotar_respaldos(bd, str(directorio), conservar=2)
+    assert sorted(os.path.basename(ruta) for ruta in eliminados) == nombres[:3]
+    assert _respaldos(directorio) == sorted(nombres[3:] + ['otra-20260101-120000-000000.db'])
+
+    with pytest.raises(ValueError):
+        Respaldo.rotar_respaldos(bd, str(directorio), conservar=0)
+
+
+def test_colision_de_nombres_no_destruye_respaldos(tmp_path, bd, mismo_instante):
+    directorio = str(tmp_path / 'respaldos')
+    for compactar in (True, True, False, False):
+        assert Respaldo.respaldar(bd, directorio, pausa=0, compactar=compactar)
+
+    respaldos = _respaldos(directorio)
+    assert len(respaldos) == 4
+    for nombre in respaldos:
+        assert Respaldo.verificar_integridad(os.path.join(directorio, nombre))
+
+
+def test_integridad_fallida_elimina_solo_el_nuevo(tmp_path, bd, mismo_instante, monkeypatch):
+    directorio = str(tmp_path / 'respaldos')
+    assert Respaldo.respaldar(bd, directorio, compactar=True)
+    anteriores = _respaldos(directorio)
+
+    monkeypatch.setattr(Respaldo, 'verificar_integridad', lambda ruta: False)
+    assert not Respaldo.respaldar(bd, directorio, compactar=True)
+    assert not Respaldo.respaldar(bd, directorio, pausa=0)
+    assert _respaldos(directorio) == anteriores
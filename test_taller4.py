@@ -0,0 +1,34 @@
+import pytest
+
+import taller4
+
+
+def test_indices_usados_en_explain_de_agregacion():
+    # Forma de 'explain' de un aggregate: el plan de la consulta va anidado en $cursor
+    explain = {
+        'stages': [
+            {'$cursor': {'queryPlanner': {
+                'winningPlan': {
+                    'stage': 'PROJECTION_COVERED',
+                    'inputStage': {'stage': 'IXSCAN', 'indexName': 'leido_1_genero_1'},
+                },
+                'rejectedPlans': [
+                    {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'clave_bloqueo_1'}},
+                ],
+            }}},
+            {'$group': {'_id': '$genero', 'total': {'$sum': {'$const': 1}}}},
+        ],
+    }
+    assert taller4._indices_usados(explain) == {'leido_1_genero_1'}
+    assert taller4._indices_usados({'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}}}) == set()
+
+
+@pytest.mark.parametrize('nombre', list(taller4.REPORTES))
+def test_match_inicial_usa_el_prefijo_del_indice(nombre):
+    pipeline, indice = taller4.REPORTES[nombre]
+    primera_etapa = pipeline()[0]
+    assert list(primera_etapa) == ['$match']
+
+    campos_indice = [campo for campo, _ in taller4.INDICES[indice]]
+    campos_match = set(primera_etapa['$match'])
+    assert campos_match == set(campos_indice[:len(campos_match)])